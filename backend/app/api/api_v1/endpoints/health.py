@@ -2,27 +2,33 @@
 Health check endpoints
 """
 
-from fastapi import APIRouter, Depends
+from typing import Dict, Any
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
+from fastapi_cache.decorator import cache
 
 from app.core.database import get_db
 from app.core.config import settings
+from app.core.cache import global_key_builder
+from app.api.deps import get_main_service
+from app.schemas.health import HealthStatus, DetailedHealthStatus, ReadinessStatus
 
 from app.services.main_service import MainService
 
 router = APIRouter()
-main_service = MainService()
 
 
-@router.get("/", response_model=Dict[str, str])
+@router.get("/", response_model=HealthStatus)
+@cache(expire=5, key_builder=global_key_builder)
 def basic_health_check():
     """Basic health check"""
     return {"status": "ok"}
 
 
 @router.get("/options", response_model=Dict[str, Any])
-def get_processing_options():
+@cache(expire=3600, key_builder=global_key_builder)
+def get_processing_options(main_service: MainService = Depends(get_main_service)):
     """Lấy tất cả các tùy chọn xử lý có sẵn"""
     try:
         return main_service.get_processing_options()
@@ -30,26 +36,15 @@ def get_processing_options():
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/detailed", summary="Detailed health check")
-async def detailed_health_check(db: AsyncSession = Depends(get_db)):
-    """Detailed health check including database connectivity"""
-    health_status = {
-        "status": "healthy",
-        "service": settings.SERVER_NAME,
-        "version": "1.0.0",
-        "database": "unknown",
-        "checks": {}
-    }
+@cache(expire=10, key_builder=global_key_builder)
+async def _healthy_status(db: AsyncSession) -> Dict[str, Any]:
+    """
+    Healthy detailed status, cached briefly.
 
-    # Check database connectivity
-    try:
-        await db.execute(text("SELECT 1"))
-        health_status["database"] = "connected"
-        health_status["checks"]["database"] = "✅ Database connection successful"
-    except Exception as e:
-        health_status["status"] = "unhealthy"
-        health_status["database"] = "disconnected"
-        health_status["checks"]["database"] = f"❌ Database connection failed: {str(e)}"
+    Raises when the database is unreachable; exceptions are not cached, so a
+    failure is always reported live and never hides a recovery.
+    """
+    await db.execute(text("SELECT 1"))
 
     # Add more health checks here as needed
     # - External API connectivity
@@ -57,12 +52,34 @@ async def detailed_health_check(db: AsyncSession = Depends(get_db)):
     # - Model availability
     # - etc.
 
-    return health_status
+    return {
+        "status": "healthy",
+        "service": settings.SERVER_NAME,
+        "version": "1.0.0",
+        "database": "connected",
+        "checks": {"database": "✅ Database connection successful"}
+    }
+
 
+@router.get("/detailed", response_model=DetailedHealthStatus, summary="Detailed health check")
+async def detailed_health_check(db: AsyncSession = Depends(get_db)):
+    """Detailed health check including database connectivity"""
+    try:
+        return await _healthy_status(db)
+    except Exception as e:
+        # Failures are reported live, never served from the cache
+        return {
+            "status": "unhealthy",
+            "service": settings.SERVER_NAME,
+            "version": "1.0.0",
+            "database": "disconnected",
+            "checks": {"database": f"❌ Database connection failed: {str(e)}"}
+        }
 
-@router.get("/ready", summary="Readiness check")
+
+@router.get("/ready", response_model=ReadinessStatus, summary="Readiness check")
 async def readiness_check(db: AsyncSession = Depends(get_db)):
-    """Readiness check for load balancers and orchestration systems"""
+    """Readiness check for load balancers and orchestration systems (never cached)"""
     try:
         # Basic database connectivity check
         await db.execute(text("SELECT 1"))
@@ -75,4 +92,4 @@ async def readiness_check(db: AsyncSession = Depends(get_db)):
         return {
             "status": "not_ready",
             "message": f"Service is not ready: {str(e)}"
-        }
\ No newline at end of file
+        }
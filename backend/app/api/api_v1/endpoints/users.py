@@ -2,118 +2,96 @@
 Users endpoints for user management
 """
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, desc, func, case, tuple_
+from sqlalchemy.orm import raiseload
 
 from app.core.database import get_db
 from app.models.user import User
 from app.core.exceptions import NotFoundException
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.schemas.user import UserPage, UserRead
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[dict], summary="List all users")
+@router.get("/", response_model=UserPage, summary="List all users")
 async def list_users(
-    skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=100, description="Number of users to return"),
+    cursor: Optional[str] = Query(None, description="Cursor returned as `next` by the previous page"),
     db: AsyncSession = Depends(get_db)
 ):
-    """List all users"""
+    """List all users (keyset pagination)"""
 
-    query = select(User).offset(skip).limit(limit)
+    query = select(User).options(raiseload("*"))
+
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(User.created_at, User.id) < tuple_(cursor_created_at, cursor_id)
+        )
+
+    query = query.order_by(desc(User.created_at), desc(User.id)).limit(limit + 1)
     result = await db.execute(query)
     users = result.scalars().all()
 
-    return [
-        {
-            "id": user.id,
-            "email": user.email,
-            "username": user.username,
-            "full_name": user.full_name,
-            "is_active": user.is_active,
-            "is_superuser": user.is_superuser,
-            "created_at": user.created_at,
-            "updated_at": user.updated_at,
-            "last_login": user.last_login
-        }
-        for user in users
-    ]
-
-
-@router.get("/{user_id}", response_model=dict, summary="Get user by ID")
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(users[-1].created_at, users[-1].id)
+
+    return {"items": users, "next": next_cursor}
+
+
+@router.get("/{user_id}", response_model=UserRead, summary="Get user by ID")
 async def get_user(
     user_id: int,
     db: AsyncSession = Depends(get_db)
 ):
     """Get a specific user by ID"""
 
-    query = select(User).where(User.id == user_id)
+    query = select(User).options(raiseload("*")).where(User.id == user_id)
     result = await db.execute(query)
     user = result.scalar_one_or_none()
 
     if not user:
         raise NotFoundException(f"User with ID {user_id} not found")
 
-    return {
-        "id": user.id,
-        "email": user.email,
-        "username": user.username,
-        "full_name": user.full_name,
-        "is_active": user.is_active,
-        "is_superuser": user.is_superuser,
-        "created_at": user.created_at,
-        "updated_at": user.updated_at,
-        "last_login": user.last_login
-    }
-
-
-@router.get("/by-email/{email}", response_model=dict, summary="Get user by email")
+    return user
+
+
+@router.get("/by-email/{email}", response_model=UserRead, summary="Get user by email")
 async def get_user_by_email(
     email: str,
     db: AsyncSession = Depends(get_db)
 ):
     """Get a specific user by email"""
 
-    query = select(User).where(User.email == email)
+    query = select(User).options(raiseload("*")).where(User.email == email)
     result = await db.execute(query)
     user = result.scalar_one_or_none()
 
     if not user:
         raise NotFoundException(f"User with email {email} not found")
 
-    return {
-        "id": user.id,
-        "email": user.email,
-        "username": user.username,
-        "full_name": user.full_name,
-        "is_active": user.is_active,
-        "is_superuser": user.is_superuser,
-        "created_at": user.created_at,
-        "updated_at": user.updated_at,
-        "last_login": user.last_login
-    }
+    return user
 
 
 @router.get("/stats/summary", response_model=dict, summary="Get user statistics")
 async def get_user_stats(db: AsyncSession = Depends(get_db)):
     """Get summary statistics for users"""
 
-    # Count total users
-    total_users_query = select(User)
-    total_users_result = await db.execute(total_users_query)
-    total_users = len(total_users_result.scalars().all())
-
-    # Count active users
-    active_users_query = select(User).where(User.is_active == True)
-    active_users_result = await db.execute(active_users_query)
-    active_users = len(active_users_result.scalars().all())
-
-    # Count admin users
-    admin_users_query = select(User).where(User.is_superuser == True)
-    admin_users_result = await db.execute(admin_users_query)
-    admin_users = len(admin_users_result.scalars().all())
+    # Count total, active and admin users in a single aggregate query
+    stats_query = select(
+        func.count(User.id),
+        func.sum(case((User.is_active == True, 1), else_=0)),
+        func.sum(case((User.is_superuser == True, 1), else_=0))
+    )
+    total_users, active_users, admin_users = (await db.execute(stats_query)).one()
+    active_users = active_users or 0
+    admin_users = admin_users or 0
 
     return {
         "total_users": total_users,
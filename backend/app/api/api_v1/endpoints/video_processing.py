@@ -5,18 +5,36 @@ Video processing endpoints for AI dubbing
 from typing import Dict, Any, Optional
 from fastapi import APIRouter, Depends, File, UploadFile, Form, HTTPException, BackgroundTasks
 from fastapi.responses import FileResponse
-import uuid
+from fastapi_cache.decorator import cache
+from sqlalchemy import select, update
+from pydantic import ValidationError as PydanticValidationError
 import os
+import stat
 from pathlib import Path
+import aiofiles
 
 from app.core.database import get_db
-from app.core.exceptions import VideoProcessingException, FileUploadException
+from app.api.deps import get_main_service, get_arq_pool
+from app.core.exceptions import VideoProcessingException, FileUploadException, ValidationException
 from app.core.config import settings
+from app.core.cache import global_key_builder
+from app.utils.ids import uuid7
+from app.schemas.job import ProcessingOptions
 from app.models.job import Job, JobStatus
 from app.services.main_service import MainService
 
 router = APIRouter()
 
+# Kích thước mỗi chunk khi ghi file upload xuống disk (1MB)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Giới hạn upload, tính sẵn một lần khi import
+SUPPORTED_FORMATS = frozenset(settings.SUPPORTED_VIDEO_FORMATS)
+SUPPORTED_FORMATS_DISPLAY = ", ".join(settings.SUPPORTED_VIDEO_FORMATS)
+MAX_FILE_SIZE = settings.MAX_FILE_SIZE
+MAX_FILE_SIZE_MB = MAX_FILE_SIZE // (1024 * 1024)
+UPLOAD_DIR = Path(settings.UPLOAD_DIR)
+
 
 @router.post("/process", response_model=Dict[str, Any], summary="Process video for AI dubbing")
 async def process_video(
@@ -25,7 +43,9 @@ async def process_video(
     video_url: Optional[str] = Form(None),
     youtube_url: Optional[str] = Form(None),
     options: Optional[str] = Form(None),  # JSON string with processing options
-    db = Depends(get_db)
+    db = Depends(get_db),
+    main_service: MainService = Depends(get_main_service),
+    arq_pool = Depends(get_arq_pool)
 ):
     """Process a video file or URL for AI dubbing"""
 
@@ -42,6 +62,16 @@ async def process_video(
             detail="Only one input method allowed (file, URL, or YouTube)"
         )
 
+    # Parse processing options once at the edge
+    try:
+        processing_options = (
+            ProcessingOptions.model_validate_json(options) if options else ProcessingOptions()
+        )
+    except PydanticValidationError as e:
+        raise ValidationException("Invalid processing options", detail=str(e))
+
+    job_id = str(uuid7())
+
     # Validate file type if file upload
     video_input = None
     if video_file:
@@ -49,42 +79,67 @@ async def process_video(
             raise FileUploadException("No file selected")
 
         file_extension = Path(video_file.filename).suffix.lower()
-        if file_extension not in settings.SUPPORTED_VIDEO_FORMATS:
+        if file_extension not in SUPPORTED_FORMATS:
             raise FileUploadException(
-                f"Unsupported file format. Supported formats: {', '.join(settings.SUPPORTED_VIDEO_FORMATS)}"
+                f"Unsupported file format. Supported formats: {SUPPORTED_FORMATS_DISPLAY}"
             )
 
-        # Check file size
-        content = await video_file.read()
-        file_size = len(content)
-        await video_file.seek(0)  # Reset file pointer
-
-        if file_size > settings.MAX_FILE_SIZE:
-            raise FileUploadException(
-                f"File too large. Maximum size: {settings.MAX_FILE_SIZE / (1024*1024):.0f}MB"
-            )
-        video_input = content
+        # Stream upload to disk in chunks, checking file size as we go
+        UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+        upload_path = UPLOAD_DIR / f"{job_id}{file_extension}"
+
+        file_size = 0
+        try:
+            async with aiofiles.open(upload_path, "wb") as f:
+                while chunk := await video_file.read(UPLOAD_CHUNK_SIZE):
+                    file_size += len(chunk)
+                    if file_size > MAX_FILE_SIZE:
+                        raise FileUploadException(
+                            f"File too large. Maximum size: {MAX_FILE_SIZE_MB}MB"
+                        )
+                    await f.write(chunk)
+        except Exception:
+            upload_path.unlink(missing_ok=True)
+            raise
+
+        video_input = str(upload_path)
     else:
         video_input = youtube_url or video_url
 
     # Create job record
-    job_id = str(uuid.uuid4())
     job = Job(
         job_id=job_id,
         status=JobStatus.PENDING,
         progress=0.0,
         input_type="file" if video_file else ("youtube" if youtube_url else "url"),
         input_filename=video_file.filename if video_file else None,
-        processing_options=options if options else {}
+        processing_options=processing_options.model_dump()
     )
 
     db.add(job)
     await db.commit()
     await db.refresh(job)
 
-    # Start background processing
-    main_service = MainService()
-    background_tasks.add_task(main_service.process_video_dubbing, video_input=video_input)
+    # Map the submitted options onto MainService.process_video_dubbing arguments
+    dubbing_options = {
+        "translator_method": processing_options.translation_method,
+        "tts_engine": processing_options.tts_engine,
+        # Only uploads are treated as local paths; URLs always go to the downloader
+        "input_type": job.input_type,
+    }
+    if processing_options.voice_id:
+        dubbing_options["voice_name"] = processing_options.voice_id
+
+    # Start background processing - on the worker queue if available
+    if arq_pool is not None:
+        await arq_pool.enqueue_job("process_video_dubbing_task", video_input, job_id, **dubbing_options)
+    else:
+        background_tasks.add_task(
+            main_service.process_video_dubbing,
+            video_input=video_input,
+            job_id=job_id,
+            **dubbing_options
+        )
 
     return {
         "job_id": job_id,
@@ -101,7 +156,7 @@ async def get_processing_status(
 ):
     """Get the current status of a video processing job"""
 
-    job = await db.get(Job, job_id)
+    job = (await db.execute(select(Job).where(Job.job_id == job_id))).scalar_one_or_none()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
 
@@ -121,7 +176,7 @@ async def download_processed_video(
 ):
     """Download the processed video file"""
 
-    job = await db.get(Job, job_id)
+    job = (await db.execute(select(Job).where(Job.job_id == job_id))).scalar_one_or_none()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
 
@@ -129,10 +184,19 @@ async def download_processed_video(
         raise HTTPException(status_code=400, detail="Job is not completed or output path is missing")
 
     output_path = Path(job.output_path)
-    if not output_path.is_file():
+    try:
+        output_stat = output_path.stat()
+    except OSError:
+        output_stat = None
+    if output_stat is None or not stat.S_ISREG(output_stat.st_mode):
         raise HTTPException(status_code=404, detail="Processed file not found")
 
-    return FileResponse(output_path, media_type="video/mp4", filename=output_path.name)
+    return FileResponse(
+        output_path,
+        media_type="video/mp4",
+        filename=output_path.name,
+        stat_result=output_stat
+    )
 
 
 @router.post("/cancel/{job_id}", response_model=Dict[str, Any], summary="Cancel processing job")
@@ -142,14 +206,22 @@ async def cancel_processing_job(
 ):
     """Cancel a running video processing job"""
 
-    job = await db.get(Job, job_id)
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
+    # Cancel atomically: only jobs still pending/processing are updated
+    cancel_query = (
+        update(Job)
+        .where(Job.job_id == job_id, Job.status.in_([JobStatus.PENDING, JobStatus.PROCESSING]))
+        .values(status=JobStatus.CANCELLED)
+        .returning(Job.job_id)
+    )
+    cancelled = (await db.execute(cancel_query)).first()
 
-    if job.status not in [JobStatus.PENDING, JobStatus.PROCESSING]:
+    if cancelled is None:
+        # Distinguish a missing job from one that is already finished
+        exists_query = select(Job.id).where(Job.job_id == job_id).limit(1)
+        if (await db.execute(exists_query)).first() is None:
+            raise HTTPException(status_code=404, detail="Job not found")
         raise HTTPException(status_code=400, detail="Job cannot be cancelled in its current state")
 
-    job.status = JobStatus.CANCELLED
     await db.commit()
 
     return {
@@ -160,6 +232,7 @@ async def cancel_processing_job(
 
 
 @router.get("/supported-formats", response_model=Dict[str, Any], summary="Get supported formats")
+@cache(expire=3600, key_builder=global_key_builder)
 async def get_supported_formats():
     """Get information about supported video formats and processing options"""
 
@@ -0,0 +1,20 @@
+"""
+Shared API dependencies
+"""
+
+from typing import Optional
+
+from arq.connections import ArqRedis
+from fastapi import Request
+
+from app.services.main_service import MainService
+
+
+def get_main_service(request: Request) -> MainService:
+    """Dependency to get the process-wide MainService created at startup"""
+    return request.app.state.main_service
+
+
+def get_arq_pool(request: Request) -> Optional[ArqRedis]:
+    """Dependency to get the Arq job queue (None if Redis is unavailable)"""
+    return request.app.state.arq
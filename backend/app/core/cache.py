@@ -0,0 +1,51 @@
+"""
+Response cache configuration for Vietnamese AI Dubbing API
+"""
+
+import logging
+from typing import Any, Callable, Optional
+
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.backends.redis import RedisBackend
+from redis import asyncio as aioredis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_redis: Optional[aioredis.Redis] = None
+
+
+def global_key_builder(func: Callable[..., Any], namespace: str = "", **kwargs: Any) -> str:
+    """
+    Cache key cho các endpoint global, không phụ thuộc user.
+
+    Bỏ qua args/kwargs (ví dụ: DB session được inject) để mọi request
+    dùng chung một key. KHÔNG dùng cho các route theo user/job.
+    """
+    return f"{namespace}:{func.__module__}:{func.__name__}"
+
+
+async def init_cache() -> None:
+    """Initialize response cache - Redis, falling back to in-memory if unavailable"""
+    global _redis
+    try:
+        _redis = aioredis.from_url(settings.REDIS_URL)
+        await _redis.ping()
+        FastAPICache.init(RedisBackend(_redis), prefix=settings.CACHE_PREFIX)
+        logger.info("✅ Response cache connected to Redis")
+    except Exception as e:
+        logger.warning(f"⚠️ Redis unavailable, using in-memory response cache: {e}")
+        _redis = None
+        FastAPICache.init(InMemoryBackend(), prefix=settings.CACHE_PREFIX)
+
+
+async def close_cache() -> None:
+    """Close Redis connection used by the response cache"""
+    try:
+        if _redis is not None:
+            await _redis.close()
+            logger.info("✅ Response cache connection closed")
+    except Exception as e:
+        logger.error(f"❌ Error closing response cache: {e}")
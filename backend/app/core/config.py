@@ -38,12 +38,32 @@ class Settings(BaseSettings):
 
     # Database Configuration
     DATABASE_URL: str = "sqlite:///./vietnamese_ai_dubbing.db"
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    SQL_ECHO: bool = False  # Log every SQL statement (e.g. SQL_ECHO=1 uvicorn main:app)
+
+    # Cache Configuration
+    REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_PREFIX: str = "vad-cache"
+
+    # Worker Configuration (Arq)
+    WORKER_MAX_JOBS: int = 1  # Số job dubbing chạy đồng thời trên mỗi worker
+    WORKER_JOB_TIMEOUT: int = 3 * 60 * 60  # 3 giờ
 
     # AI Service Configuration
     FUNASR_MODEL_PATH: str = "./models/funasr"
+    FUNASR_TORCH_COMPILE: bool = False  # Compile paraformer bằng torch.compile (chậm lúc load, nhanh khi inference)
+    TRANSCRIPT_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # Dung lượng tối đa của cache transcribe trên đĩa
     EDGETTS_VOICE: str = "vi-VN-NamMinhNeural"
+    TTS_MAX_CONCURRENCY: int = 8  # Số segment TTS tổng hợp đồng thời tối đa
+    TTS_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # Dung lượng tối đa của cache audio TTS
+    TTS_CACHE_NORMALIZE_TEXT: bool = False  # Dùng chung cache cho các câu chỉ khác hoa/thường, khoảng trắng, dấu câu cuối
     TRANSLATION_API_KEY: Optional[str] = None
     TRANSLATION_API_URL: str = "https://api.cognitive.microsofttranslator.com"
+    TRANSLATION_CONCURRENCY: int = 8  # Số request dịch đồng thời tối đa tới mỗi provider
+    GOOGLE_TRANSLATE_RATE: float = 10.0  # Số request Google Translate tối đa mỗi giây
+    TRANSLATION_CACHE_TTL_HOURS: int = 30 * 24  # Thời gian giữ kết quả dịch trong cache
+    MARIAN_INT8_CPU: bool = False  # Quantize MarianMT (Linear -> int8) khi chạy trên CPU
 
     # Video Processing Configuration
     MAX_VIDEO_SIZE_MB: int = 500
@@ -5,7 +5,7 @@ Database configuration and connection management
 import asyncio
 import logging
 from typing import Generator, AsyncGenerator
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
 from sqlalchemy.pool import StaticPool
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
@@ -14,19 +14,43 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+IS_SQLITE = settings.DATABASE_URL.startswith("sqlite")
+IS_SQLITE_MEMORY = IS_SQLITE and ":memory:" in settings.DATABASE_URL
+
 
 class Base(DeclarativeBase):
     """Base class for all database models"""
     pass
 
 
+def _pool_options() -> dict:
+    """Connection pool options - StaticPool only for in-memory SQLite, sized pool otherwise"""
+    if IS_SQLITE_MEMORY:
+        return {"poolclass": StaticPool}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_pre_ping": True
+    }
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Enable WAL so readers run concurrently with the writer"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
 # Create sync engine for SQLite
 engine = create_engine(
     settings.DATABASE_URL,
-    echo=settings.DEBUG,
+    echo=settings.SQL_ECHO,
+    echo_pool=False,
     future=True,
-    poolclass=StaticPool if settings.DATABASE_URL.startswith("sqlite") else None,
-    connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
+    connect_args={"check_same_thread": False} if IS_SQLITE else {},
+    **_pool_options()
 )
 
 # Create sync session factory
@@ -38,12 +62,17 @@ session_factory = sessionmaker(
 # Create async engine for SQLite
 async_engine = create_async_engine(
     settings.DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://"),
-    echo=settings.DEBUG,
+    echo=settings.SQL_ECHO,
+    echo_pool=False,
     future=True,
-    poolclass=StaticPool if settings.DATABASE_URL.startswith("sqlite") else None,
-    connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
+    connect_args={"check_same_thread": False} if IS_SQLITE else {},
+    **_pool_options()
 )
 
+if IS_SQLITE and not IS_SQLITE_MEMORY:
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
 # Create async session factory
 async_session_factory = async_sessionmaker(
     bind=async_engine,
@@ -52,11 +81,14 @@ async_session_factory = async_sessionmaker(
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """Dependency to get database session"""
+    """
+    Dependency to get database session
+
+    Không tự commit: các endpoint ghi dữ liệu phải gọi `await db.commit()`.
+    """
     async with async_session_factory() as session:
         try:
             yield session
-            await session.commit()
         except Exception:
             await session.rollback()
             raise
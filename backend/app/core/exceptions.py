@@ -103,4 +103,10 @@ class VideoDownloadException(BaseAPIException):
     """Exception raised for video download errors"""
 
     def __init__(self, message: str = "Video download failed", detail: Optional[str] = None):
-        super().__init__(message, status_code=500, detail=detail)
\ No newline at end of file
+        super().__init__(message, status_code=500, detail=detail)
+
+class JobCancelledException(BaseAPIException):
+    """Exception raised when a job was cancelled while it was being processed"""
+
+    def __init__(self, message: str = "Job was cancelled", detail: Optional[str] = None):
+        super().__init__(message, status_code=409, detail=detail)
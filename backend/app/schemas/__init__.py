@@ -0,0 +1,19 @@
+"""
+Response schemas for Vietnamese AI Dubbing API
+"""
+
+from .job import ProcessingOptions, JobListItem, JobRead, JobPage
+from .user import UserRead, UserPage
+from .health import HealthStatus, DetailedHealthStatus, ReadinessStatus
+
+__all__ = [
+    'ProcessingOptions',
+    'JobListItem',
+    'JobRead',
+    'JobPage',
+    'UserRead',
+    'UserPage',
+    'HealthStatus',
+    'DetailedHealthStatus',
+    'ReadinessStatus'
+]
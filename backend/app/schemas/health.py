@@ -0,0 +1,30 @@
+"""
+Health check response schemas
+"""
+
+from typing import Dict
+
+from pydantic import BaseModel
+
+
+class HealthStatus(BaseModel):
+    """Basic liveness status"""
+
+    status: str
+
+
+class DetailedHealthStatus(BaseModel):
+    """Health status including dependency checks"""
+
+    status: str
+    service: str
+    version: str
+    database: str
+    checks: Dict[str, str] = {}
+
+
+class ReadinessStatus(BaseModel):
+    """Readiness status for load balancers"""
+
+    status: str
+    message: str
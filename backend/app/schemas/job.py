@@ -0,0 +1,62 @@
+"""
+Job response schemas
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.models.job import JobStatus
+
+
+class ProcessingOptions(BaseModel):
+    """Processing options submitted with a video (the `options` form field)"""
+
+    model_config = ConfigDict(extra="ignore")
+
+    tts_engine: str = "edgetts"
+    voice_id: Optional[str] = None
+    translation_method: str = "google"
+    is_multi_speaker: bool = True
+
+
+class JobListItem(BaseModel):
+    """Job summary returned by the list endpoint"""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    job_id: str
+    status: JobStatus
+    progress: Optional[float] = None
+    input_type: Optional[str] = None
+    input_filename: Optional[str] = None
+    output_filename: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    processing_time: Optional[float] = None
+    error_message: Optional[str] = None
+
+
+class JobRead(JobListItem):
+    """Full job details"""
+
+    input_path: Optional[str] = None
+    processing_options: Optional[Any] = None
+    output_path: Optional[str] = None
+    error_details: Optional[Any] = None
+    file_size: Optional[int] = None
+    duration: Optional[float] = None
+    # `metadata` is reserved on declarative models, so the column attribute is job_metadata
+    metadata: Optional[Dict[str, Any]] = Field(None, validation_alias="job_metadata")
+    user_id: Optional[Union[int, str]] = None
+
+
+class JobPage(BaseModel):
+    """A page of jobs with the cursor for the next page"""
+
+    items: List[JobListItem]
+    next: Optional[str] = None
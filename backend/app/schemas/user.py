@@ -0,0 +1,31 @@
+"""
+User response schemas
+"""
+
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class UserRead(BaseModel):
+    """Public user details"""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    email: str
+    username: Optional[str] = None
+    full_name: Optional[str] = None
+    is_active: bool = True
+    is_superuser: bool = False
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    last_login: Optional[datetime] = None
+
+
+class UserPage(BaseModel):
+    """A page of users with the cursor for the next page"""
+
+    items: List[UserRead]
+    next: Optional[str] = None
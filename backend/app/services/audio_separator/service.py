@@ -5,25 +5,131 @@ Xử lý việc tách audio thành vocals và background music
 
 import os
 import logging
-from typing import Dict, Any, Tuple, Optional
+from typing import Dict, Any, Tuple, Optional, ClassVar
+from types import MappingProxyType
 from pathlib import Path
-import subprocess
 import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from app.core.config import settings
 from app.core.exceptions import VideoProcessingException
+from app.utils.media import decode_audio, probe_audio
 
 logger = logging.getLogger(__name__)
 
+# Danh sách models Demucs được hỗ trợ và thông tin mô tả (tĩnh, dùng chung cho mọi instance)
+SUPPORTED_MODELS: Tuple[str, ...] = (
+    "htdemucs_ft",
+    "htdemucs",
+    "htdemucs_6s",
+    "mdx_extra",
+    "mdx_extra_q"
+)
+
+_MODEL_INFO = MappingProxyType({
+    "htdemucs_ft": MappingProxyType({
+        "name": "HTDemucs FT",
+        "description": "Fine-tuned version of HTDemucs",
+        "quality": "High",
+        "speed": "Medium"
+    }),
+    "htdemucs": MappingProxyType({
+        "name": "HTDemucs",
+        "description": "Hybrid Transformer Demucs",
+        "quality": "High",
+        "speed": "Medium"
+    }),
+    "htdemucs_6s": MappingProxyType({
+        "name": "HTDemucs 6s",
+        "description": "HTDemucs trained on 6 second clips",
+        "quality": "Medium",
+        "speed": "Fast"
+    })
+})
+
+
+def _decode_pcm(path: str, samplerate: int, channels: int):
+    """
+    Decode audio stream đầu tiên của file thành tensor float32 (channels, samples)
+
+    PyAV resample từng frame về đúng samplerate/số kênh của model Demucs.
+    """
+    import torch
+
+    return torch.from_numpy(decode_audio(path, samplerate, channels))
+
+
+def _save_audio(wav, path: str, samplerate: int):
+    """Ghi tensor ra file WAV bằng hàm save_audio của Demucs (4.1 có demucs.api, 4.0 chỉ có demucs.audio)"""
+    try:
+        from demucs.api import save_audio
+    except ImportError:
+        from demucs.audio import save_audio
+
+    save_audio(wav, path, samplerate=samplerate)
+
+
+class _PretrainedSeparator:
+    """
+    Separator tương thích với demucs.api.Separator cho Demucs 4.0 (bản trên PyPI chưa có demucs.api)
+
+    Giữ model đã load trong bộ nhớ và gọi apply_model giống như demucs.separate, chỉ expose
+    các thuộc tính/method mà service này dùng.
+    """
+
+    def __init__(self, model: str, device: str, jobs: int = 0):
+        from demucs.pretrained import get_model
+
+        self._model = get_model(model)
+        self._model.eval()
+        self._device = device
+        self._jobs = jobs
+        self.samplerate = self._model.samplerate
+        self.audio_channels = self._model.audio_channels
+
+    def separate_tensor(self, wav, sr: Optional[int] = None):
+        import torch
+        from demucs.apply import apply_model
+
+        # Chuẩn hóa giống demucs.separate trước khi đưa vào model
+        ref = wav.mean(0)
+        mean, std = ref.mean(), ref.std()
+        normalized = (wav - mean) / (std + 1e-8)
+
+        with torch.inference_mode():
+            sources = apply_model(
+                self._model, normalized[None], device=self._device,
+                split=True, overlap=0.25, progress=False, num_workers=self._jobs
+            )[0]
+        sources = sources * std + mean
+
+        return wav, dict(zip(self._model.sources, sources))
+
+    def separate_audio_file(self, path: Path):
+        wav = _decode_pcm(str(path), self.samplerate, self.audio_channels)
+        return self.separate_tensor(wav, self.samplerate)
+
 
 class AudioSeparatorService:
     """Service xử lý việc tách audio thành vocals và background music"""
 
+    # Demucs Separator đã load weights, dùng chung cho mọi instance: model -> Separator
+    _separators: ClassVar[Dict[str, Any]] = {}
+    _separators_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    # Thư mục temp/models đã được tạo trong process này chưa
+    _dirs_ready: ClassVar[bool] = False
+
     def __init__(self):
         self.temp_dir = Path(settings.TEMP_DIR)
-        self.temp_dir.mkdir(exist_ok=True)
         self.models_dir = Path(settings.MODELS_DIR) / "audio_separator"
-        self.models_dir.mkdir(parents=True, exist_ok=True)
+
+        # Chỉ tạo thư mục một lần cho mỗi process
+        if not type(self)._dirs_ready:
+            self.temp_dir.mkdir(exist_ok=True)
+            self.models_dir.mkdir(parents=True, exist_ok=True)
+            type(self)._dirs_ready = True
 
     async def extract_vocals(
         self,
@@ -56,38 +162,124 @@ class AudioSeparatorService:
 
             logger.info(f"Bắt đầu tách audio: {audio_path} với model {model}")
 
-            # Sử dụng API Python của Demucs
-            from demucs import separate
+            # Dùng Separator đã load sẵn model thay vì gọi lại CLI của demucs
+            separator = await asyncio.to_thread(self._get_separator, model)
+            _, separated = await asyncio.to_thread(separator.separate_audio_file, Path(audio_path))
 
-            # Tham số cho demucs
-            args = [
-                "-n", model,
-                "--two-stems=vocals",
-                "-o", str(output_dir),
-                "--filename", "{stem}_{track}.{ext}",
-                str(audio_path)
-            ]
+            await self._save_stems(separator, separated, vocals_path, background_path)
 
-            # Chạy demucs
-            separate.main(args)
+            logger.info(f"Đã tách audio thành công: vocals={vocals_path}, background={background_path}")
+            return vocals_path, background_path
 
-            # Xác định đường dẫn file output
-            vocals_path = str(output_dir / f"{audio_filename}_vocals.wav")
-            background_path = str(output_dir / f"{audio_filename}_no_vocals.wav")
+        except Exception as e:
+            logger.error(f"Lỗi khi tách audio: {str(e)}")
+            raise VideoProcessingException(f"Không thể tách audio: {str(e)}")
+
+    async def extract_vocals_from_video(
+        self,
+        video_path: str,
+        output_dir: Optional[str] = None,
+        model: str = "htdemucs_ft"
+    ) -> Tuple[str, str]:
+        """
+        Tách vocals và background music trực tiếp từ video
+
+        Audio được decode bằng PyAV thành tensor trong bộ nhớ và đưa thẳng vào Demucs,
+        không cần ghi file WAV trung gian.
+
+        Args:
+            video_path: Đường dẫn đến file video (hoặc audio)
+            output_dir: Thư mục output (nếu None thì dùng temp_dir)
+            model: Model sử dụng cho việc tách
+
+        Returns:
+            Tuple[str, str]: (vocals_path, background_path)
+        """
+        try:
+            if not os.path.exists(video_path):
+                raise FileNotFoundError(f"Video file không tồn tại: {video_path}")
+
+            output_dir = Path(output_dir) if output_dir else self.temp_dir
+            output_dir.mkdir(exist_ok=True)
+
+            video_filename = Path(video_path).stem
+            vocals_path = str(output_dir / f"{video_filename}_vocals.wav")
+            background_path = str(output_dir / f"{video_filename}_background.wav")
 
-            if not os.path.exists(vocals_path) or not os.path.exists(background_path):
-                # Kiểm tra xem có file output nào không, nếu không thì báo lỗi
-                raise VideoProcessingException(
-                    f"Tách audio thất bại. Không tìm thấy file output. "
-                    f"Kiểm tra log của demucs để biết chi tiết."
-                )
+            logger.info(f"Bắt đầu tách audio từ video: {video_path} với model {model}")
+
+            separator = await asyncio.to_thread(self._get_separator, model)
+            wav = await asyncio.to_thread(
+                _decode_pcm, video_path, separator.samplerate, separator.audio_channels
+            )
+            _, separated = await asyncio.to_thread(separator.separate_tensor, wav, separator.samplerate)
+
+            await self._save_stems(separator, separated, vocals_path, background_path)
 
             logger.info(f"Đã tách audio thành công: vocals={vocals_path}, background={background_path}")
             return vocals_path, background_path
 
         except Exception as e:
-            logger.error(f"Lỗi khi tách audio: {str(e)}")
-            raise VideoProcessingException(f"Không thể tách audio: {str(e)}")
+            logger.error(f"Lỗi khi tách audio từ video: {str(e)}")
+            raise VideoProcessingException(f"Không thể tách audio từ video: {str(e)}")
+
+    async def _save_stems(self, separator, separated: Dict[str, Any], vocals_path: str, background_path: str):
+        """Ghi stem vocals và background (tổng các stem còn lại) ra file WAV"""
+        # Background = tổng tất cả các stem không phải vocals
+        vocals = separated["vocals"]
+        background = sum(stem for name, stem in separated.items() if name != "vocals")
+
+        await asyncio.to_thread(_save_audio, vocals, vocals_path, separator.samplerate)
+        await asyncio.to_thread(_save_audio, background, background_path, separator.samplerate)
+
+        if not os.path.exists(vocals_path) or not os.path.exists(background_path):
+            # Kiểm tra xem có file output nào không, nếu không thì báo lỗi
+            raise VideoProcessingException(
+                f"Tách audio thất bại. Không tìm thấy file output. "
+                f"Kiểm tra log của demucs để biết chi tiết."
+            )
+
+    def _get_separator(self, model: str):
+        """Lấy Demucs Separator cho model, load weights ở lần gọi đầu tiên"""
+        separator = self._separators.get(model)
+        if separator is not None:
+            return separator
+
+        with self._separators_lock:
+            separator = self._separators.get(model)
+            if separator is None:
+                import torch
+
+                try:
+                    from demucs.api import Separator
+                except ImportError:
+                    # demucs.api chỉ có từ Demucs 4.1 (chưa phát hành trên PyPI)
+                    Separator = _PretrainedSeparator
+
+                device = "cuda" if torch.cuda.is_available() else "cpu"
+                logger.info(f"Đang load Demucs model {model} trên {device}")
+                separator = Separator(model=model, device=device, jobs=os.cpu_count() or 1)
+                self._separators[model] = separator
+
+        return separator
+
+    async def warmup(self, model: str = "htdemucs_ft"):
+        """Load trước weights của model và chạy thử để request đầu tiên không phải chờ"""
+        try:
+            separator = await asyncio.to_thread(self._get_separator, model)
+            # Chạy 1 giây silence qua model để khởi tạo kernel/bộ nhớ trên device
+            await asyncio.to_thread(self._separate_silence, separator)
+            logger.info(f"Đã warmup Demucs model {model}")
+        except Exception as e:
+            logger.warning(f"Không thể warmup Demucs model {model}: {str(e)}")
+
+    @staticmethod
+    def _separate_silence(separator, duration: float = 1.0):
+        """Tách thử một đoạn silence ngắn"""
+        import torch
+
+        silence = torch.zeros(separator.audio_channels, int(separator.samplerate * duration))
+        separator.separate_tensor(silence, separator.samplerate)
 
     async def _create_mock_audio_file(self, file_path: str, duration: int = 10):
         """Tạo mock audio file để test (KHÔNG DÙNG TRONG PRODUCTION)"""
@@ -95,7 +287,6 @@ class AudioSeparatorService:
         try:
             # Tạo file WAV đơn giản với silence
             import wave
-            import struct
 
             with wave.open(file_path, 'wb') as wav_file:
                 # Cấu hình WAV
@@ -103,12 +294,11 @@ class AudioSeparatorService:
                 wav_file.setsampwidth(2)  # 16-bit
                 wav_file.setframerate(44100)  # 44.1kHz
 
-                # Tạo silence data
+                # Tạo silence data: 2 kênh * 2 bytes mỗi frame, toàn byte 0
                 frames = int(44100 * duration)  # Số frames
-                silence_data = struct.pack('<' + 'h' * frames * 2, *[0] * frames * 2)
+                silence_data = b'\x00' * (frames * 4)
 
                 wav_file.writeframes(silence_data)
-                wav_file.setnframes(frames)
 
             logger.info(f"Đã tạo mock audio file: {file_path}")
 
@@ -118,7 +308,7 @@ class AudioSeparatorService:
             with open(file_path, 'wb') as f:
                 f.write(b'')
 
-    def get_audio_info(self, audio_path: str) -> Dict[str, Any]:
+    async def get_audio_info(self, audio_path: str) -> Dict[str, Any]:
         """
         Lấy thông tin audio file
 
@@ -129,46 +319,16 @@ class AudioSeparatorService:
             Dict chứa thông tin audio
         """
         try:
-            if not os.path.exists(audio_path):
+            try:
+                stat = os.stat(audio_path)
+            except FileNotFoundError:
                 return {'error': 'File không tồn tại'}
 
-            # Sử dụng ffprobe để lấy thông tin
-            cmd = [
-                'ffprobe',
-                '-v', 'quiet',
-                '-print_format', 'json',
-                '-show_format',
-                '-show_streams',
-                audio_path
-            ]
-
-            process = subprocess.run(cmd, capture_output=True, text=True)
-            if process.returncode != 0:
-                return {'error': 'Không thể đọc thông tin audio'}
-
-            import json
-            info = json.loads(process.stdout)
-
-            # Lấy thông tin cơ bản
-            audio_info = {
-                'duration': float(info['format'].get('duration', 0)),
-                'size': int(info['format'].get('size', 0)),
-                'bitrate': int(info['format'].get('bit_rate', 0)),
-                'format': info['format'].get('format_name', 'Unknown')
-            }
-
-            # Lấy thông tin stream
-            for stream in info.get('streams', []):
-                if stream.get('codec_type') == 'audio':
-                    audio_info.update({
-                        'codec': stream.get('codec_name', 'Unknown'),
-                        'sample_rate': int(stream.get('sample_rate', 0)),
-                        'channels': int(stream.get('channels', 0)),
-                        'channel_layout': stream.get('channel_layout', 'Unknown')
-                    })
-                    break
-
-            return audio_info
+            # PyAV đọc header trực tiếp, chạy trong thread để không block event loop
+            audio_info = await asyncio.to_thread(
+                probe_audio, audio_path, stat.st_mtime_ns, stat.st_size
+            )
+            return dict(audio_info)
 
         except Exception as e:
             logger.error(f"Lỗi khi lấy thông tin audio: {str(e)}")
@@ -205,27 +365,48 @@ class AudioSeparatorService:
         """
         try:
             import time
-            current_time = time.time()
-
-            # Dọn dẹp trong temp_dir
-            for file_path in self.temp_dir.glob("*"):
-                if file_path.is_file():
-                    file_age = current_time - file_path.stat().st_mtime
-                    if file_age > (older_than_hours * 3600):
-                        file_path.unlink()
-                        logger.info(f"Đã xóa file tạm audio: {file_path}")
-
-            # Dọn dẹp trong models_dir
-            for file_path in self.models_dir.glob("*"):
-                if file_path.is_file():
-                    file_age = current_time - file_path.stat().st_mtime
-                    if file_age > (older_than_hours * 3600):
-                        file_path.unlink()
-                        logger.info(f"Đã xóa model file cũ: {file_path}")
+            threshold = time.time() - older_than_hours * 3600
+
+            import numpy as np
+
+            # os.scandir trả về DirEntry đã cache thông tin stat, không cần stat lại từng file
+            paths = []
+            mtimes = []
+            for directory in (self.temp_dir, self.models_dir):
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_file(follow_symlinks=False):
+                            paths.append(entry.path)
+                            mtimes.append(entry.stat(follow_symlinks=False).st_mtime)
+
+            if not paths:
+                return
+
+            # So sánh tuổi của tất cả file trong một phép toán vector
+            expired_mask = np.asarray(mtimes, dtype=np.float64) < threshold
+            expired_files = [paths[i] for i in np.flatnonzero(expired_mask)]
+
+            if not expired_files:
+                return
+
+            # unlink là blocking I/O, xóa song song bằng thread pool
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(self._remove_file, expired_files))
 
         except Exception as e:
             logger.error(f"Lỗi khi dọn dẹp file tạm: {str(e)}")
 
+    @staticmethod
+    def _remove_file(file_path: str):
+        """Xóa một file, bỏ qua nếu file đã bị xóa"""
+        try:
+            os.unlink(file_path)
+            logger.info(f"Đã xóa file tạm audio: {file_path}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Không thể xóa file {file_path}: {str(e)}")
+
     async def check_model_availability(self, model: str = "htdemucs_ft") -> bool:
         """
         Kiểm tra model có sẵn không
@@ -253,40 +434,16 @@ class AudioSeparatorService:
 
     def get_supported_models(self) -> list:
         """Lấy danh sách models được hỗ trợ"""
-        return [
-            "htdemucs_ft",
-            "htdemucs",
-            "htdemucs_6s",
-            "mdx_extra",
-            "mdx_extra_q"
-        ]
+        return list(SUPPORTED_MODELS)
 
     def get_model_info(self, model: str) -> Dict[str, Any]:
         """Lấy thông tin về model"""
-        model_info = {
-            "htdemucs_ft": {
-                "name": "HTDemucs FT",
-                "description": "Fine-tuned version of HTDemucs",
-                "quality": "High",
-                "speed": "Medium"
-            },
-            "htdemucs": {
-                "name": "HTDemucs",
-                "description": "Hybrid Transformer Demucs",
-                "quality": "High",
-                "speed": "Medium"
-            },
-            "htdemucs_6s": {
-                "name": "HTDemucs 6s",
-                "description": "HTDemucs trained on 6 second clips",
-                "quality": "Medium",
-                "speed": "Fast"
+        info = _MODEL_INFO.get(model)
+        if info is None:
+            return {
+                "name": model,
+                "description": "Unknown model",
+                "quality": "Unknown",
+                "speed": "Unknown"
             }
-        }
-
-        return model_info.get(model, {
-            "name": model,
-            "description": "Unknown model",
-            "quality": "Unknown",
-            "speed": "Unknown"
-        })
\ No newline at end of file
+        return dict(info)
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""
+Job Progress Publisher
+Ghi tiến độ của job xuống database theo lô, tránh commit cho mỗi bước nhỏ
+"""
+
+import logging
+import time
+from typing import Any, Dict, Tuple
+
+from sqlalchemy import update
+
+from app.core.database import async_session_factory
+from app.models.job import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+
+class JobProgressPublisher:
+    """
+    Throttle việc cập nhật progress/message của job.
+
+    Progress chỉ được ghi tối đa một lần mỗi `min_interval` giây cho mỗi job;
+    các thay đổi trạng thái (PROCESSING, COMPLETED, FAILED, ...) luôn được ghi ngay.
+    Job đã bị hủy (CANCELLED) không bao giờ bị ghi đè; update/set_status trả về False
+    để pipeline biết mà dừng xử lý.
+    """
+
+    def __init__(self, min_interval: float = 0.5, session_factory=async_session_factory):
+        self.min_interval = min_interval
+        self.session_factory = session_factory
+        # job_id -> (thời điểm flush cuối, các field chưa được ghi)
+        self._state: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+    async def update(self, job_id: str, progress: float, message: str) -> bool:
+        """
+        Cập nhật progress, chỉ ghi xuống DB khi đã qua min_interval
+
+        Returns:
+            False nếu job đã bị hủy, True trong các trường hợp còn lại
+        """
+        last_flush, pending = self._state.get(job_id, (0.0, {}))
+        pending.update(progress=progress, message=message)
+
+        now = time.monotonic()
+        if now - last_flush < self.min_interval:
+            self._state[job_id] = (last_flush, pending)
+            return True
+
+        if not await self._flush(job_id, pending):
+            self._state.pop(job_id, None)
+            return False
+        self._state[job_id] = (now, {})
+        return True
+
+    async def set_status(self, job_id: str, status: JobStatus, **fields: Any) -> bool:
+        """
+        Chuyển trạng thái job, luôn ghi ngay kèm các field đang chờ
+
+        Returns:
+            False nếu job đã bị hủy (trạng thái không được ghi), True trong các trường hợp còn lại
+        """
+        _, pending = self._state.pop(job_id, (0.0, {}))
+        pending.update(fields)
+        pending["status"] = status
+
+        if not await self._flush(job_id, pending):
+            return False
+
+        if status == JobStatus.PROCESSING:
+            self._state[job_id] = (time.monotonic(), {})
+        return True
+
+    async def _flush(self, job_id: str, values: Dict[str, Any]) -> bool:
+        """
+        Ghi các field xuống bảng jobs bằng một câu UPDATE
+
+        Job đã CANCELLED bị loại khỏi UPDATE để tiến độ/trạng thái của pipeline không
+        ghi đè lên lệnh hủy. Trả về False khi không có dòng nào được cập nhật (job đã
+        bị hủy hoặc không còn tồn tại).
+        """
+        if not values:
+            return True
+        try:
+            async with self.session_factory() as session:
+                result = await session.execute(
+                    update(Job)
+                    .where(Job.job_id == job_id, Job.status != JobStatus.CANCELLED)
+                    .values(**values)
+                )
+                await session.commit()
+            return result.rowcount != 0
+        except Exception as e:
+            # Lỗi DB không được làm dừng pipeline
+            logger.warning(f"Không thể cập nhật tiến độ job {job_id}: {str(e)}")
+            return True
@@ -5,14 +5,25 @@ Kết nối và điều phối tất cả các service modules
 
 import os
 import logging
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, Optional, Tuple, Union
 from pathlib import Path
 import asyncio
+import functools
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+import httpx
+
 from app.core.config import settings
-from app.core.exceptions import VideoProcessingException
+from app.core.exceptions import JobCancelledException, VideoProcessingException
+from app.models.job import JobStatus
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson là tùy chọn, fallback về json chuẩn
+    orjson = None
 
 # Import tất cả các services
 from .video_downloader import VideoDownloaderService
@@ -21,60 +32,142 @@ from .speech_recognition import SpeechRecognitionService
 from .translation import TranslationService
 from .text_to_speech import TextToSpeechService
 from .video_synthesis import VideoSynthesisService
+from .job_progress import JobProgressPublisher
 
 logger = logging.getLogger(__name__)
 
 
+def _unlink_many(paths: List[str]):
+    """Xóa danh sách file, bỏ qua file không tồn tại (không cần kiểm tra exists trước)"""
+    for file_path in paths:
+        try:
+            os.unlink(file_path)
+            logger.debug(f"Đã xóa file tạm: {file_path}")
+        except (FileNotFoundError, IsADirectoryError):
+            pass
+        except OSError as e:
+            logger.warning(f"Không thể xóa file tạm {file_path}: {str(e)}")
+
+
 class MainService:
     """
     Main Service - Orchestrator chính cho Vietnamese AI Dubbing
     Điều phối tất cả các service modules để thực hiện quy trình dubbing hoàn chỉnh
     """
 
+    # Thời gian (giây) dùng lại kết quả kiểm tra trạng thái service
+    STATUS_CACHE_TTL = 10.0
+
+    # Thời gian (giây) dùng lại kích thước thư mục đã tính
+    DIR_SIZE_CACHE_TTL = 60.0
+
+    # Engine TTS mặc định cho pipeline dubbing (chất lượng cao hơn gtts)
+    TTS_ENGINE = "edgetts"
+
+    # Số segment mỗi lần gọi dịch và số segment đã dịch tối đa chờ TTS
+    TRANSLATION_BATCH_SIZE = 32
+    PIPELINE_QUEUE_SIZE = 8
+
     def __init__(self):
         """Khởi tạo MainService với tất cả các service con"""
         self.temp_dir = Path(settings.TEMP_DIR)
         self.output_dir = Path(settings.OUTPUT_DIR)
         self.models_dir = Path(settings.MODELS_DIR)
 
+        # HTTP client dùng chung cho các API bên ngoài (giữ kết nối, HTTP/2 khi server hỗ trợ)
+        self.http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        )
+
         # Khởi tạo tất cả services
         self.video_downloader = VideoDownloaderService()
         self.audio_separator = AudioSeparatorService()
         self.speech_recognizer = SpeechRecognitionService()
-        self.translator = TranslationService()
-        self.tts_service = TextToSpeechService()
+        self.translator = TranslationService(http_client=self.http_client)
+        self.tts_service = TextToSpeechService(http_client=self.http_client)
         self.video_synthesizer = VideoSynthesisService()
 
         # Progress callback
         self.progress_callback = None
 
+        # Ghi tiến độ job xuống database (có throttle)
+        self.progress_publisher = JobProgressPublisher()
+
+        # Cache kết quả kiểm tra service: service_name -> (timestamp, status)
+        self._status_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+        # Cache kích thước thư mục: path -> (timestamp, bytes)
+        self._dir_size_cache: Dict[Path, Tuple[float, int]] = {}
+
+        # Options xử lý không đổi trong suốt vòng đời process, build khi cần lần đầu
+        self._processing_options: Optional[Dict[str, Any]] = None
+
+        # Thread pool cho các bước blocking (ghi file, ffprobe, ...) để không chặn event loop
+        self._io_pool = ThreadPoolExecutor(
+            max_workers=min(16, (os.cpu_count() or 1) * 2),
+            thread_name_prefix="dubbing-io"
+        )
+
         logger.info("MainService đã được khởi tạo với tất cả service modules")
 
+    async def aclose(self):
+        """Giải phóng tài nguyên dùng chung (HTTP client, thread pool)"""
+        await self.translator.aclose()
+        await self.tts_service.aclose()
+        await self.http_client.aclose()
+        self._io_pool.shutdown(wait=False)
+
+    async def warmup(self):
+        """Chuẩn bị trước các model nặng để job đầu tiên không phải chờ load"""
+        start = time.monotonic()
+        await self.speech_recognizer.warmup()
+        logger.info(f"Warmup speech recognition mất {time.monotonic() - start:.2f}s")
+
+        start = time.monotonic()
+        await self.audio_separator.warmup()
+        logger.info(f"Warmup audio separator mất {time.monotonic() - start:.2f}s")
+
     def set_progress_callback(self, callback):
         """Thiết lập callback để báo cáo tiến độ"""
         self.progress_callback = callback
 
-    def _report_progress(self, progress: float, message: str):
-        """Báo cáo tiến độ"""
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Chạy hàm đồng bộ trên thread pool dùng chung của service"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io_pool, functools.partial(func, *args, **kwargs))
+
+    async def _report_progress(self, progress: float, message: str, job_id: Optional[str] = None):
+        """Báo cáo tiến độ, raise JobCancelledException nếu job đã bị hủy"""
         if self.progress_callback:
             self.progress_callback(progress, message)
+        if job_id and not await self.progress_publisher.update(job_id, progress, message):
+            raise JobCancelledException(f"Job {job_id} đã bị hủy")
 
     async def process_video_dubbing(
         self,
         video_input: Union[str, bytes],
         translator_method: str = "google",
         voice_name: str = "vi",
+        tts_engine: Optional[str] = None,
+        input_type: str = "url",
         output_name: Optional[str] = None,
+        job_id: Optional[str] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """
         Xử lý quy trình dubbing video hoàn chỉnh
 
         Args:
-            video_input: URL YouTube, URL video, hoặc file bytes
+            video_input: URL YouTube, URL video, đường dẫn file đã upload, hoặc file bytes
             translator_method: Phương pháp dịch (google, azure, aws, local)
             voice_name: Tên voice sử dụng cho TTS
+            tts_engine: Engine TTS (nếu None thì dùng TTS_ENGINE)
+            input_type: "file" nếu video_input là đường dẫn file upload (phải nằm trong UPLOAD_DIR),
+                ngược lại video_input (str) luôn được coi là URL và tải về
             output_name: Tên file output (optional)
+            job_id: ID của job để cập nhật tiến độ vào database (optional)
             **kwargs: Các tham số bổ sung
 
         Returns:
@@ -82,56 +175,63 @@ class MainService:
         """
         start_time = datetime.now()
         temp_files = []
+        tts_engine = tts_engine or self.TTS_ENGINE
 
         try:
-            self._report_progress(0, "Bắt đầu quá trình dubbing video...")
+            if job_id and not await self.progress_publisher.set_status(
+                job_id, JobStatus.PROCESSING, started_at=start_time
+            ):
+                raise JobCancelledException(f"Job {job_id} đã bị hủy")
+            await self._report_progress(0, "Bắt đầu quá trình dubbing video...", job_id)
 
             # Phase 1: Download/Extract video
-            self._report_progress(5, "Đang tải video...")
-            video_path = await self._handle_video_input(video_input)
+            await self._report_progress(5, "Đang tải video...", job_id)
+            video_path = await self._handle_video_input(video_input, input_type=input_type)
             temp_files.append(video_path)
 
-            # Phase 2: Extract audio từ video
-            self._report_progress(15, "Đang tách audio từ video...")
-            audio_path = await self.video_synthesizer.extract_audio_from_video(video_path)
-            temp_files.append(audio_path)
-
-            # Phase 3: Tách vocals và background music
-            self._report_progress(25, "Đang tách vocals và background music...")
-            vocals_path, background_path = await self.audio_separator.extract_vocals(audio_path)
+            # Phase 2 + 3: Decode audio từ video và tách vocals/background trong bộ nhớ
+            await self._report_progress(15, "Đang tách vocals và background music...", job_id)
+            vocals_path, background_path = await self.audio_separator.extract_vocals_from_video(video_path)
             temp_files.extend([vocals_path, background_path])
 
             # Phase 4: Speech recognition
-            self._report_progress(35, "Đang nhận dạng giọng nói...")
+            await self._report_progress(35, "Đang nhận dạng giọng nói...", job_id)
             transcript = await self.speech_recognizer.transcribe_audio(vocals_path)
             logger.info(f"Đã transcribe thành công: {len(transcript.get('segments', []))} segments")
 
-            # Phase 5: Translation
-            self._report_progress(50, f"Đang dịch {len(transcript.get('segments', []))} segments với method: {translator_method}")
-            translated_segments = await self.translator.translate_segments(
-                transcript["segments"],
-                target_lang="vi",
-                method=translator_method
+            # Phase 5 + 6: Dịch và TTS chạy theo pipeline, segment nào dịch xong được TTS ngay
+            segments = transcript.get("segments", [])
+            await self._report_progress(
+                50,
+                f"Đang dịch {len(segments)} segments với method: {translator_method} "
+                f"và tạo audio tiếng Việt với voice: {voice_name}",
+                job_id
             )
-            logger.info(f"Đã dịch thành công {len(translated_segments)} segments")
-
-            # Phase 6: Text to Speech
-            self._report_progress(70, f"Đang tạo audio tiếng Việt với voice: {voice_name}")
-            viet_audio_path = await self.tts_service.create_audio_from_segments(
-                translated_segments,
+            translated_segments, segment_files = await self._translate_and_synthesize(
+                segments,
+                translator_method=translator_method,
                 voice_name=voice_name,
-                engine="edgetts" # Sử dụng engine chất lượng cao hơn
+                tts_engine=tts_engine
             )
-            temp_files.append(viet_audio_path)
+            logger.info(f"Đã dịch thành công {len(translated_segments)} segments")
 
-            # Phase 7: Tạo subtitle file
-            self._report_progress(80, "Đang tạo file subtitle...")
-            sub_path = self.video_synthesizer.create_subtitle_file(translated_segments)
-            temp_files.append(sub_path)
+            # Phase 7: Ghép audio và tạo subtitle (chỉ phụ thuộc vào bản dịch) song song
+            await self._report_progress(75, "Đang ghép audio tiếng Việt và tạo file subtitle...", job_id)
+            tts_result, sub_path = await asyncio.gather(
+                self.tts_service.merge_segment_audio(
+                    segment_files,
+                    total_segments=len(segments),
+                    voice_name=voice_name,
+                    engine=tts_engine
+                ),
+                self._run_blocking(self.video_synthesizer.create_subtitle_file, translated_segments)
+            )
+            viet_audio_path = tts_result["output_path"]
+            temp_files.extend([viet_audio_path, sub_path])
 
             # Phase 8: Tổng hợp video cuối cùng
-            self._report_progress(90, "Đang tổng hợp video hoàn chỉnh...")
-            final_video_path = await self.video_synthesizer.combine_audio_video(
+            await self._report_progress(90, "Đang tổng hợp video hoàn chỉnh...", job_id)
+            final_video = await self.video_synthesizer.combine_audio_video(
                 video_path=video_path,
                 audio_path=viet_audio_path,
                 subtitle_path=sub_path,
@@ -139,9 +239,10 @@ class MainService:
                 background_volume=kwargs.get('background_volume', 0.3),
                 voice_volume=kwargs.get('voice_volume', 1.0)
             )
+            final_video_path = final_video["output_path"]
 
             # Phase 9: Cleanup và hoàn thành
-            self._report_progress(95, "Đang dọn dẹp file tạm thời...")
+            await self._report_progress(95, "Đang dọn dẹp file tạm thời...", job_id)
             await self._cleanup_temp_files(temp_files)
 
             processing_time = (datetime.now() - start_time).total_seconds()
@@ -159,26 +260,157 @@ class MainService:
                 "metadata": {
                     "translator_method": translator_method,
                     "voice_name": voice_name,
+                    "tts_engine": tts_engine,
                     "output_name": output_name,
                     "created_at": datetime.now().isoformat(),
                     "processing_time_seconds": processing_time
                 }
             }
 
-            self._report_progress(100, f"Hoàn thành xử lý video trong {processing_time:.2f} giây")
+            await self._report_progress(100, f"Hoàn thành xử lý video trong {processing_time:.2f} giây", job_id)
+            if job_id:
+                await self.progress_publisher.set_status(
+                    job_id,
+                    JobStatus.COMPLETED,
+                    output_path=final_video_path,
+                    output_filename=Path(final_video_path).name,
+                    completed_at=datetime.now(),
+                    processing_time=processing_time
+                )
             logger.info(f"Hoàn thành xử lý: {final_video_path}")
 
             return result
 
+        except asyncio.CancelledError:
+            # Task bị hủy từ bên ngoài (Arq job_timeout, worker tắt): không phải Exception nên
+            # phải xử lý riêng, nếu không job kẹt ở PROCESSING và file tạm không được dọn
+            logger.warning(f"Job {job_id} bị dừng giữa chừng (timeout hoặc worker tắt)")
+            if job_id:
+                await self.progress_publisher.set_status(
+                    job_id,
+                    JobStatus.FAILED,
+                    error_message="Job bị dừng do quá thời gian xử lý hoặc worker tắt",
+                    completed_at=datetime.now()
+                )
+            await self._cleanup_temp_files(temp_files)
+            raise
+
+        except JobCancelledException as e:
+            # Job bị hủy qua API: dừng pipeline, không ghi đè trạng thái CANCELLED
+            logger.info(str(e))
+            await self._cleanup_temp_files(temp_files)
+            return {"success": False, "cancelled": True, "job_id": job_id}
+
         except Exception as e:
             logger.error(f"Lỗi trong quá trình xử lý: {str(e)}")
+            if job_id:
+                await self.progress_publisher.set_status(
+                    job_id,
+                    JobStatus.FAILED,
+                    error_message=str(e),
+                    completed_at=datetime.now()
+                )
             await self._cleanup_temp_files(temp_files)
             raise VideoProcessingException(f"Quá trình dubbing thất bại: {str(e)}")
 
-    async def _handle_video_input(self, video_input: Union[str, bytes], original_filename: Optional[str] = None) -> str:
+    async def _translate_and_synthesize(
+        self,
+        segments: List[Dict[str, Any]],
+        translator_method: str,
+        voice_name: str,
+        tts_engine: str
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Dịch và tạo giọng nói cho segments theo kiểu producer/consumer.
+
+        Segments được dịch theo từng batch (vài batch song song); mỗi segment dịch xong được
+        đưa vào queue để TTS xử lý ngay (nhiều segment song song) trong khi các batch khác
+        vẫn đang được dịch.
+
+        Returns:
+            Tuple (segments đã dịch, file audio của từng segment theo đúng thứ tự)
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.PIPELINE_QUEUE_SIZE)
+        translated_segments: List[Optional[Dict[str, Any]]] = [None] * len(segments)
+        segment_files: Dict[int, Dict[str, Any]] = {}
+
+        tts_tasks: List[asyncio.Future] = []
+
+        async def translate_worker():
+            # Batch nào dịch xong trước thì đưa sang TTS trước
+            stream = self.translator.stream_translate_segments(
+                segments,
+                target_lang="vi",
+                method=translator_method,
+                batch_size=self.TRANSLATION_BATCH_SIZE
+            )
+            try:
+                async for index, segment in stream:
+                    translated_segments[index] = segment
+                    await queue.put((index, segment))
+            finally:
+                # Đóng generator ngay (kể cả khi bị hủy lúc đang chờ queue.put)
+                # để các batch dịch còn lại bị hủy thay vì chờ GC
+                await stream.aclose()
+            # Báo cho TTS worker dừng; nếu dịch lỗi thì TTS worker bị hủy ở dưới
+            await queue.put(None)
+
+        semaphore = asyncio.Semaphore(self.tts_service.max_concurrency(tts_engine))
+
+        async def synthesize(index: int, segment: Dict[str, Any]):
+            try:
+                segment_file = await self.tts_service.synthesize_segment(
+                    segment, voice_name=voice_name, engine=tts_engine, index=index
+                )
+                if segment_file:
+                    segment_files[index] = segment_file
+            finally:
+                semaphore.release()
+
+        async def tts_worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                # Chờ slot trống trước khi lấy tiếp để giữ backpressure lên queue
+                await semaphore.acquire()
+                tts_tasks.append(asyncio.ensure_future(synthesize(*item)))
+            await asyncio.gather(*tts_tasks)
+
+        workers = [asyncio.ensure_future(translate_worker()), asyncio.ensure_future(tts_worker())]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            # Hủy worker dịch (có thể đang chờ queue.put) và các task TTS còn chạy,
+            # chờ chúng dừng hẳn rồi mới xóa file để không task nào ghi file sau khi dọn
+            await self._cancel_tasks(workers + tts_tasks)
+            await self._cleanup_temp_files([f["file_path"] for f in segment_files.values()])
+            raise
+
+        return translated_segments, [segment_files[i] for i in sorted(segment_files)]
+
+    @staticmethod
+    async def _cancel_tasks(tasks: List[asyncio.Future]):
+        """Hủy các task và chờ tất cả kết thúc (bỏ qua exception của chúng)"""
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _handle_video_input(
+        self,
+        video_input: Union[str, bytes],
+        original_filename: Optional[str] = None,
+        input_type: str = "url"
+    ) -> str:
         """Xử lý input video từ nhiều nguồn khác nhau bằng cách sử dụng VideoDownloaderService"""
         try:
+            if isinstance(video_input, str) and input_type == "file":
+                # File upload đã được endpoint ghi sẵn xuống disk; chỉ nhận đường dẫn trong
+                # UPLOAD_DIR vì file này sẽ bị xóa khi dọn dẹp
+                return self._resolve_upload_path(video_input)
+
             if isinstance(video_input, str):
+                # URL do client gửi lên luôn đi qua downloader, không bao giờ coi là đường dẫn local
                 if self.video_downloader.is_youtube_url(video_input):
                     video_info = await self.video_downloader.download_from_youtube(video_input)
                 else:
@@ -202,36 +434,58 @@ class MainService:
             # Re-raise với thông tin chi tiết hơn
             raise VideoProcessingException(f"Không thể xử lý video input: {e}")
 
+    @staticmethod
+    def _resolve_upload_path(path: str) -> str:
+        """Trả về đường dẫn tuyệt đối của file upload, raise nếu nằm ngoài UPLOAD_DIR"""
+        upload_dir = Path(settings.UPLOAD_DIR).resolve()
+        resolved = Path(path).resolve()
+        if upload_dir not in resolved.parents or not resolved.is_file():
+            raise VideoProcessingException(f"File upload không hợp lệ: {path}")
+        return str(resolved)
+
     async def _cleanup_temp_files(self, temp_files: List[str]):
         """Dọn dẹp các file tạm thời"""
         try:
-            for file_path in temp_files:
-                if file_path and os.path.exists(file_path):
-                    os.unlink(file_path)
-                    logger.debug(f"Đã xóa file tạm: {file_path}")
+            paths = [file_path for file_path in temp_files if file_path]
+            if paths:
+                await self._run_blocking(_unlink_many, paths)
+            # Nội dung thư mục đã thay đổi (file tạm bị xóa, video output mới được ghi)
+            self._dir_size_cache.clear()
         except Exception as e:
             logger.warning(f"Lỗi khi dọn dẹp file tạm: {str(e)}")
 
     async def get_service_status(self) -> Dict[str, Any]:
         """Lấy trạng thái của tất cả services"""
-        return {
-            "video_downloader": await self._check_service_status(self.video_downloader, "VideoDownloaderService"),
-            "audio_separator": await self._check_service_status(self.audio_separator, "AudioSeparatorService"),
-            "speech_recognition": await self._check_service_status(self.speech_recognizer, "SpeechRecognitionService"),
-            "translation": await self._check_service_status(self.translator, "TranslationService"),
-            "text_to_speech": await self._check_service_status(self.tts_service, "TextToSpeechService"),
-            "video_synthesis": await self._check_service_status(self.video_synthesizer, "VideoSynthesisService"),
-            "overall_status": "ready" if all([
-                (await self._check_service_status(self.video_downloader, "VideoDownloaderService"))["available"],
-                (await self._check_service_status(self.audio_separator, "AudioSeparatorService"))["available"],
-                (await self._check_service_status(self.speech_recognizer, "SpeechRecognitionService"))["available"],
-                (await self._check_service_status(self.translator, "TranslationService"))["available"],
-                (await self._check_service_status(self.tts_service, "TextToSpeechService"))["available"],
-                (await self._check_service_status(self.video_synthesizer, "VideoSynthesisService"))["available"]
-            ]) else "partial"
+        services = {
+            "video_downloader": (self.video_downloader, "VideoDownloaderService"),
+            "audio_separator": (self.audio_separator, "AudioSeparatorService"),
+            "speech_recognition": (self.speech_recognizer, "SpeechRecognitionService"),
+            "translation": (self.translator, "TranslationService"),
+            "text_to_speech": (self.tts_service, "TextToSpeechService"),
+            "video_synthesis": (self.video_synthesizer, "VideoSynthesisService")
         }
 
+        # Kiểm tra tất cả services đồng thời, mỗi service chỉ một lần
+        results = await asyncio.gather(*[
+            self._check_service_status(service, service_name)
+            for service, service_name in services.values()
+        ])
+
+        status = dict(zip(services.keys(), results))
+        status["overall_status"] = "ready" if all(r["available"] for r in results) else "partial"
+        return status
+
     async def _check_service_status(self, service, service_name: str) -> Dict[str, Any]:
+        """Kiểm tra trạng thái của một service, dùng lại kết quả trong STATUS_CACHE_TTL giây"""
+        cached = self._status_cache.get(service_name)
+        if cached and time.monotonic() - cached[0] < self.STATUS_CACHE_TTL:
+            return cached[1]
+
+        status = await self._probe_service_status(service, service_name)
+        self._status_cache[service_name] = (time.monotonic(), status)
+        return status
+
+    async def _probe_service_status(self, service, service_name: str) -> Dict[str, Any]:
         """Kiểm tra trạng thái của một service cụ thể"""
         try:
             # Kiểm tra các method cơ bản
@@ -272,7 +526,14 @@ class MainService:
             }
 
     def get_processing_options(self) -> Dict[str, Any]:
-        """Lấy tất cả options cho quá trình xử lý"""
+        """Lấy tất cả options cho quá trình xử lý (nội dung tĩnh, chỉ build một lần)"""
+        if self._processing_options is None:
+            self._processing_options = self._build_processing_options()
+        return self._processing_options
+
+    def _build_processing_options(self) -> Dict[str, Any]:
+        """Tổng hợp options từ các service con"""
+        supported_models = self.audio_separator.get_supported_models()
         return {
             "video_downloader": {
                 "supported_sources": ["youtube", "url", "file_upload"],
@@ -280,8 +541,8 @@ class MainService:
                 "format_options": ["mp4", "webm", "avi"]
             },
             "audio_separator": {
-                "models": self.audio_separator.get_supported_models(),
-                "model_info": {model: self.audio_separator.get_model_info(model) for model in self.audio_separator.get_supported_models()}
+                "models": supported_models,
+                "model_info": {model: self.audio_separator.get_model_info(model) for model in supported_models}
             },
             "speech_recognition": {
                 "models": self.speech_recognizer.get_supported_models(),
@@ -317,12 +578,31 @@ class MainService:
         }
 
     def _get_directory_size(self, path: Path) -> int:
-        """Lấy kích thước thư mục"""
+        """Lấy kích thước thư mục, dùng lại kết quả trong DIR_SIZE_CACHE_TTL giây"""
+        cached = self._dir_size_cache.get(path)
+        if cached and time.monotonic() - cached[0] < self.DIR_SIZE_CACHE_TTL:
+            return cached[1]
+
         try:
-            return sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+            size = self._scan_directory_size(str(path))
         except Exception:
             return 0
 
+        self._dir_size_cache[path] = (time.monotonic(), size)
+        return size
+
+    @staticmethod
+    def _scan_directory_size(path: str) -> int:
+        """Tính tổng kích thước bằng os.scandir (mỗi entry chỉ một lần stat)"""
+        total = 0
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    total += entry.stat(follow_symlinks=False).st_size
+                elif entry.is_dir(follow_symlinks=False):
+                    total += MainService._scan_directory_size(entry.path)
+        return total
+
     def _get_disk_usage(self) -> Dict[str, Any]:
         """Lấy thông tin sử dụng disk"""
         try:
@@ -349,8 +629,8 @@ class MainService:
                 self.models_dir.exists()
             ])
 
-            # Kiểm tra FFmpeg
-            ffmpeg_available = await self.video_synthesizer.check_ffmpeg_availability()
+            # FFmpeg đã được kiểm tra qua trạng thái của VideoSynthesisService, không probe lại
+            ffmpeg_available = service_status["video_synthesis"]["available"]
 
             return {
                 "status": "healthy" if (service_status["overall_status"] == "ready" and dirs_ok and ffmpeg_available) else "unhealthy",
@@ -381,8 +661,12 @@ class MainService:
         try:
             cache_file = self.temp_dir.parent / "app" / "services" / "service_cache.json"
             if cache_file.exists():
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                with open(cache_file, 'rb') as f:
+                    data = f.read()
+                if orjson is None:
+                    return json.loads(data.decode('utf-8'))
+                # orjson parse trực tiếp từ bytes, không decode qua str
+                return orjson.loads(data)
             else:
                 return {"error": "Cache file không tồn tại"}
         except Exception as e:
@@ -394,8 +678,18 @@ class MainService:
             cache_file = self.temp_dir.parent / "app" / "services" / "service_cache.json"
             cache_data["metadata"]["last_updated"] = datetime.now().isoformat()
 
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
+            if orjson is not None:
+                payload = orjson.dumps(
+                    cache_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                )
+            else:
+                payload = json.dumps(cache_data, ensure_ascii=False, indent=2).encode('utf-8')
+
+            # Ghi ra file tạm rồi rename để tránh file cache bị ghi dở
+            tmp_file = cache_file.with_suffix('.json.tmp')
+            with open(tmp_file, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_file, cache_file)
 
             logger.info("Đã cập nhật service cache")
             return {"success": True}
@@ -4,45 +4,158 @@ Xử lý việc nhận dạng giọng nói từ audio files
 """
 
 import os
+import copy
+import hashlib
 import logging
-from typing import Dict, Any, List, Optional
+import mmap
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, ClassVar, Tuple
 from pathlib import Path
 import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import orjson
+import torch
 
 from app.core.config import settings
 from app.core.exceptions import VideoProcessingException
+from app.utils.media import decode_audio, probe_audio
 from funasr import AutoModel
 
 logger = logging.getLogger(__name__)
 
+# Phần mở rộng audio được chấp nhận
+VALID_AUDIO_EXTENSIONS = frozenset({'.wav', '.mp3', '.flac', '.aac', '.ogg', '.m4a', '.wma'})
+
+# Sample rate đầu vào của các model FunASR
+SAMPLE_RATE = 16000
+
+# Số file hết hạn tối thiểu để chuyển sang xóa song song bằng thread pool
+PARALLEL_UNLINK_THRESHOLD = 64
+
+# Số kết quả transcribe giữ trong bộ nhớ, theo hash nội dung audio
+TRANSCRIPT_CACHE_SIZE = 64
+
+
+def _hash_file(path: str) -> str:
+    """Hash nội dung file bằng blake2b qua mmap, không copy file vào bộ nhớ Python"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return hashlib.blake2b(b'').hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return hashlib.blake2b(mm).hexdigest()
+
 
 class SpeechRecognitionService:
     """Service xử lý việc nhận dạng giọng nói từ audio"""
 
+    # FunASR model (~2GB) dùng chung cho mọi instance trong process
+    _model: ClassVar[Any] = None
+    _model_error: ClassVar[Optional[str]] = None
+    _model_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    # Thread riêng cho inference: một CUDA context, không tranh thread pool mặc định
+    # với các tác vụ blocking ngắn (DB, file I/O) của ứng dụng
+    _inference_executor: ClassVar[ThreadPoolExecutor] = ThreadPoolExecutor(
+        max_workers=1, thread_name_prefix="funasr"
+    )
+
+    # Gộp các request transcribe đồng thời vào một lần gọi model.generate
+    BATCH_MAX_SIZE = 4
+    BATCH_WAIT_SECONDS = 0.02
+    BATCH_QUEUE_SIZE = 32
+
+    # LRU kết quả transcribe theo hash nội dung audio (retry, người dùng sửa lại job)
+    _transcript_cache: ClassVar["OrderedDict[str, Dict[str, Any]]"] = OrderedDict()
+    _transcript_cache_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    # Tổng dung lượng cache transcribe trên đĩa ước tính, None cho tới lần quét thư mục đầu tiên
+    _transcript_disk_bytes: ClassVar[Optional[int]] = None
+
     def __init__(self):
         self.temp_dir = Path(settings.TEMP_DIR)
         self.temp_dir.mkdir(exist_ok=True)
         self.models_dir = Path(settings.MODELS_DIR) / "speech_recognition"
         self.models_dir.mkdir(parents=True, exist_ok=True)
+        # Bản lưu trên đĩa của cache transcribe, giữ được qua các lần restart
+        self.transcript_cache_dir = self.models_dir / "transcripts"
         
-        # Khởi tạo model FunASR
-        # Sử dụng model hỗ trợ nhận dạng dấu câu, và nhận dạng nhiều người nói (diarization)
+        # Chạy trên GPU nếu có
+        self.device = "cuda:0" if torch.cuda.is_available() else "cpu"
+
+        # Hàng đợi (audio_path, future) cho batch worker, tạo khi có request đầu tiên
+        self._batch_queue: Optional[asyncio.Queue] = None
+        self._batch_task: Optional[asyncio.Task] = None
+
+    @property
+    def model(self):
+        """FunASR model dùng chung, None nếu chưa load"""
+        return type(self)._model
+
+    def _get_model(self):
+        """Lấy FunASR model, load ở lần gọi đầu tiên trong process"""
+        cls = type(self)
+        if cls._model is not None:
+            return cls._model
+
+        with cls._model_lock:
+            if cls._model is None:
+                # Khởi tạo model FunASR
+                # Sử dụng model hỗ trợ nhận dạng dấu câu, và nhận dạng nhiều người nói (diarization)
+                try:
+                    cls._model = AutoModel(
+                        model="paraformer-zh-streaming-vad-punc-spk",
+                        model_revision="v2.0.4",
+                        vad_model="fsmn-vad",
+                        vad_model_revision="v2.0.4",
+                        punc_model="ct-punc-c",
+                        punc_model_revision="v2.0.4",
+                        spk_model="cam++",
+                        spk_model_revision="v2.0.2",
+                        device=self.device,
+                        ncpu=4
+                    )
+                    cls._model_error = None
+                    logger.info(f"FunASR model đã được khởi tạo trên {self.device}.")
+
+                    self._prepare_for_inference(cls._model)
+                    if settings.FUNASR_TORCH_COMPILE:
+                        self._compile_model(cls._model)
+                except Exception as e:
+                    cls._model_error = str(e)
+                    logger.error(f"Không thể khởi tạo FunASR model: {e}")
+                    raise VideoProcessingException(f"FunASR model không được khởi tạo thành công: {e}")
+
+        return cls._model
+
+    @staticmethod
+    def _prepare_for_inference(model):
+        """Chuyển các sub-model của FunASR sang eval mode và tắt gradient cho weights"""
+        for name in ("model", "vad_model", "punc_model", "spk_model"):
+            module = getattr(model, name, None)
+            if isinstance(module, torch.nn.Module):
+                module.eval()
+                module.requires_grad_(False)
+
+    @staticmethod
+    def _compile_model(model):
+        """Compile nn.Module của paraformer bằng torch.compile, giữ eager nếu không compile được"""
         try:
-            self.model = AutoModel(
-                model="paraformer-zh-streaming-vad-punc-spk",
-                model_revision="v2.0.4",
-                vad_model="fsmn-vad",
-                vad_model_revision="v2.0.4",
-                punc_model="ct-punc-c",
-                punc_model_revision="v2.0.4",
-                spk_model="cam++",
-                spk_model_revision="v2.0.2",
-                # device="cuda:0" # Uncomment nếu có GPU
-            )
-            logger.info("FunASR model đã được khởi tạo.")
+            # dynamic=True để độ dài audio khác nhau không gây compile lại mỗi request
+            model.model = torch.compile(model.model, dynamic=True)
+            logger.info("Đã compile FunASR paraformer bằng torch.compile")
+        except Exception as e:
+            logger.warning(f"Không thể compile FunASR model, dùng eager mode: {e}")
+
+    async def warmup(self):
+        """Load trước FunASR model để request đầu tiên không phải chờ"""
+        try:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._inference_executor, self._get_model)
         except Exception as e:
-            logger.error(f"Không thể khởi tạo FunASR model: {e}")
-            self.model = None
+            logger.warning(f"Không thể warmup FunASR model: {str(e)}")
 
     async def transcribe_audio(
         self,
@@ -62,24 +175,176 @@ class SpeechRecognitionService:
             Dict chứa kết quả transcription.
         """
         try:
-            if not self.model:
-                raise VideoProcessingException("FunASR model không được khởi tạo thành công.")
             if not os.path.exists(audio_path):
                 raise FileNotFoundError(f"Audio file không tồn tại: {audio_path}")
 
+            content_hash = await asyncio.to_thread(_hash_file, audio_path)
+            cached = await asyncio.to_thread(self._get_cached_transcript, content_hash)
+            if cached is not None:
+                logger.info(f"Dùng lại kết quả transcribe đã cache cho: {audio_path}")
+                return cached
+
             logger.info(f"Bắt đầu transcribe audio: {audio_path} với FunASR")
 
+            # Gửi vào hàng đợi để được gộp batch với các request đang chờ khác
             loop = asyncio.get_running_loop()
-            result = await loop.run_in_executor(
-                None, self.model.generate, audio_path, {"hotword": "AI, Gemini"}
-            )
+            future = loop.create_future()
+            await self._get_batch_queue().put((audio_path, future))
+            result = await future
 
-            return self._format_funasr_result(result, audio_path)
+            formatted = self._format_funasr_result([result], audio_path)
+            await asyncio.to_thread(self._store_cached_transcript, content_hash, formatted)
+            return formatted
 
         except Exception as e:
             logger.error(f"Lỗi khi transcribe audio với FunASR: {str(e)}")
             raise VideoProcessingException(f"Không thể transcribe audio: {str(e)}")
 
+    def _get_cached_transcript(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Tìm kết quả transcribe theo hash, trong bộ nhớ trước rồi tới bản trên đĩa"""
+        cls = type(self)
+        with cls._transcript_cache_lock:
+            cached = cls._transcript_cache.get(content_hash)
+            if cached is not None:
+                cls._transcript_cache.move_to_end(content_hash)
+                return copy.deepcopy(cached)
+
+        cache_file = self.transcript_cache_dir / f"{content_hash}.json"
+        try:
+            cached = orjson.loads(cache_file.read_bytes())
+            # Cập nhật mtime để eviction giữ lại các entry vừa dùng
+            os.utime(cache_file)
+        except (OSError, orjson.JSONDecodeError):
+            return None
+
+        self._remember_transcript(content_hash, cached)
+        return copy.deepcopy(cached)
+
+    def _store_cached_transcript(self, content_hash: str, result: Dict[str, Any]):
+        """Lưu kết quả transcribe vào LRU và ghi bản sao xuống đĩa"""
+        self._remember_transcript(content_hash, copy.deepcopy(result))
+
+        try:
+            self.transcript_cache_dir.mkdir(exist_ok=True)
+            cache_file = self.transcript_cache_dir / f"{content_hash}.json"
+            tmp_file = cache_file.with_suffix(".tmp")
+            payload = orjson.dumps(result)
+            tmp_file.write_bytes(payload)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            logger.warning(f"Không thể lưu cache transcribe xuống đĩa: {e}")
+            return
+
+        cls = type(self)
+        with cls._transcript_cache_lock:
+            if cls._transcript_disk_bytes is None:
+                cls._transcript_disk_bytes = self._scan_transcript_cache()[0]
+            else:
+                cls._transcript_disk_bytes += len(payload)
+            over_limit = cls._transcript_disk_bytes > settings.TRANSCRIPT_CACHE_MAX_BYTES
+
+        if over_limit:
+            self._evict_transcript_cache()
+
+    def _scan_transcript_cache(self) -> Tuple[int, List[Tuple[float, str, int]]]:
+        """Tổng dung lượng và danh sách (mtime, path, size) các file trong cache transcribe"""
+        files = []
+        with os.scandir(self.transcript_cache_dir) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False) and entry.name.endswith(".json"):
+                    stat = entry.stat(follow_symlinks=False)
+                    files.append((stat.st_mtime, entry.path, stat.st_size))
+        return sum(size for _, _, size in files), files
+
+    def _evict_transcript_cache(self):
+        """Xóa các transcript dùng lâu nhất (theo mtime) tới khi cache còn dưới 90% giới hạn"""
+        cls = type(self)
+        with cls._transcript_cache_lock:
+            try:
+                total, files = self._scan_transcript_cache()
+            except OSError as e:
+                logger.warning(f"Không thể quét cache transcribe: {e}")
+                return
+
+            target = int(settings.TRANSCRIPT_CACHE_MAX_BYTES * 0.9)
+            files.sort()
+
+            for _, path, size in files:
+                if total <= target:
+                    break
+                try:
+                    os.unlink(path)
+                    total -= size
+                except OSError:
+                    pass
+
+            cls._transcript_disk_bytes = total
+            logger.info(f"Đã dọn cache transcribe, còn {total} bytes")
+
+    def _remember_transcript(self, content_hash: str, result: Dict[str, Any]):
+        """Thêm vào LRU trong bộ nhớ, bỏ mục cũ nhất khi vượt TRANSCRIPT_CACHE_SIZE"""
+        cls = type(self)
+        with cls._transcript_cache_lock:
+            cls._transcript_cache[content_hash] = result
+            cls._transcript_cache.move_to_end(content_hash)
+            while len(cls._transcript_cache) > TRANSCRIPT_CACHE_SIZE:
+                cls._transcript_cache.popitem(last=False)
+
+    def _get_batch_queue(self) -> asyncio.Queue:
+        """Lấy hàng đợi transcribe, khởi động batch worker ở lần gọi đầu tiên"""
+        if self._batch_queue is None:
+            self._batch_queue = asyncio.Queue(maxsize=self.BATCH_QUEUE_SIZE)
+            self._batch_task = asyncio.ensure_future(self._batch_worker())
+        return self._batch_queue
+
+    async def _batch_worker(self):
+        """Gom các request đang chờ thành một lần gọi model.generate"""
+        loop = asyncio.get_running_loop()
+        queue = self._batch_queue
+
+        while True:
+            batch = [await queue.get()]
+
+            # Chờ thêm tối đa BATCH_WAIT_SECONDS để gom các request đến gần nhau
+            deadline = loop.time() + self.BATCH_WAIT_SECONDS
+            while len(batch) < self.BATCH_MAX_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            paths = [audio_path for audio_path, _ in batch]
+            try:
+                results = await loop.run_in_executor(self._inference_executor, self._transcribe_sync, paths)
+                if len(results) != len(batch):
+                    raise VideoProcessingException(
+                        f"FunASR trả về {len(results)} kết quả cho {len(batch)} file audio"
+                    )
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _transcribe_sync(self, audio_paths: List[str]) -> list:
+        """Chạy FunASR (blocking) cho một batch file, dùng FP16 autocast khi chạy trên GPU"""
+        model = self._get_model()
+
+        # Decode một lần về 16 kHz mono bằng PyAV rồi đưa thẳng waveform vào model,
+        # FunASR không phải tự load + resample lại từ file
+        waveforms = [decode_audio(audio_path, SAMPLE_RATE, channels=1)[0] for audio_path in audio_paths]
+
+        with torch.inference_mode():
+            if self.device.startswith("cuda"):
+                with torch.autocast("cuda", dtype=torch.float16):
+                    return model.generate(waveforms, fs=SAMPLE_RATE, hotword="AI, Gemini")
+            return model.generate(waveforms, fs=SAMPLE_RATE, hotword="AI, Gemini")
+
     def _format_funasr_result(self, funasr_result: list, audio_path: str) -> Dict[str, Any]:
         """
         Chuyển đổi kết quả từ FunASR sang format chuẩn.
@@ -96,21 +361,26 @@ class SpeechRecognitionService:
         full_text = data.get('value', '')
         segments_raw = data.get('sentence_info', [])
 
-        segments = []
-        all_speakers = set()
+        # Đổi timestamp ms -> giây cho toàn bộ segments bằng một phép chia vector
+        count = len(segments_raw)
+        starts = (np.fromiter((seg['start'] for seg in segments_raw), dtype=np.float64, count=count) / 1000.0).tolist()
+        ends = (np.fromiter((seg['end'] for seg in segments_raw), dtype=np.float64, count=count) / 1000.0).tolist()
 
-        for i, seg in enumerate(segments_raw):
-            speaker_id = seg.get('spk', 1)
-            speaker_tag = f"SPEAKER_{speaker_id:02d}"
-            all_speakers.add(speaker_tag)
+        # Format tag một lần cho mỗi speaker thay vì cho mỗi segment
+        speaker_ids = [seg.get('spk', 1) for seg in segments_raw]
+        speaker_tags = {speaker_id: f"SPEAKER_{speaker_id:02d}" for speaker_id in set(speaker_ids)}
+        all_speakers = set(speaker_tags.values())
 
-            segments.append({
+        segments = [
+            {
                 "id": i,
-                "start": seg['start'] / 1000.0,
-                "end": seg['end'] / 1000.0,
+                "start": start,
+                "end": end,
                 "text": seg['text'].strip(),
-                "speaker": speaker_tag
-            })
+                "speaker": speaker_tags[speaker_id]
+            }
+            for i, (seg, start, end, speaker_id) in enumerate(zip(segments_raw, starts, ends, speaker_ids))
+        ]
 
         formatted_result = {
             "text": full_text.strip(),
@@ -127,7 +397,7 @@ class SpeechRecognitionService:
 
 
 
-    def get_audio_info(self, audio_path: str) -> Dict[str, Any]:
+    async def get_audio_info(self, audio_path: str) -> Dict[str, Any]:
         """
         Lấy thông tin audio file
 
@@ -138,47 +408,16 @@ class SpeechRecognitionService:
             Dict chứa thông tin audio
         """
         try:
-            if not os.path.exists(audio_path):
+            try:
+                stat = os.stat(audio_path)
+            except FileNotFoundError:
                 return {'error': 'File không tồn tại'}
 
-            # Sử dụng ffprobe để lấy thông tin
-            import subprocess
-            cmd = [
-                'ffprobe',
-                '-v', 'quiet',
-                '-print_format', 'json',
-                '-show_format',
-                '-show_streams',
-                audio_path
-            ]
-
-            process = subprocess.run(cmd, capture_output=True, text=True)
-            if process.returncode != 0:
-                return {'error': 'Không thể đọc thông tin audio'}
-
-            import json
-            info = json.loads(process.stdout)
-
-            # Lấy thông tin cơ bản
-            audio_info = {
-                'duration': float(info['format'].get('duration', 0)),
-                'size': int(info['format'].get('size', 0)),
-                'bitrate': int(info['format'].get('bit_rate', 0)),
-                'format': info['format'].get('format_name', 'Unknown')
-            }
-
-            # Lấy thông tin stream
-            for stream in info.get('streams', []):
-                if stream.get('codec_type') == 'audio':
-                    audio_info.update({
-                        'codec': stream.get('codec_name', 'Unknown'),
-                        'sample_rate': int(stream.get('sample_rate', 0)),
-                        'channels': int(stream.get('channels', 0)),
-                        'channel_layout': stream.get('channel_layout', 'Unknown')
-                    })
-                    break
-
-            return audio_info
+            # PyAV đọc header trực tiếp, chạy trong thread để không block event loop
+            audio_info = await asyncio.to_thread(
+                probe_audio, audio_path, stat.st_mtime_ns, stat.st_size
+            )
+            return dict(audio_info)
 
         except Exception as e:
             logger.error(f"Lỗi khi lấy thông tin audio: {str(e)}")
@@ -198,13 +437,14 @@ class SpeechRecognitionService:
         Returns:
             True nếu file hợp lệ
         """
-        if not os.path.exists(audio_path):
+        if Path(audio_path).suffix.lower() not in VALID_AUDIO_EXTENSIONS:
             return False
 
-        valid_extensions = ['.wav', '.mp3', '.flac', '.aac', '.ogg', '.m4a', '.wma']
-        ext = Path(audio_path).suffix.lower()
-
-        return ext in valid_extensions
+        try:
+            os.stat(audio_path)
+        except OSError:
+            return False
+        return True
 
     def get_supported_models(self) -> Dict[str, List[str]]:
         """Lấy danh sách models được hỗ trợ."""
@@ -218,8 +458,8 @@ class SpeechRecognitionService:
         return ["auto", "en", "zh", "ja", "ko", "vi", "ru", "de", "fr"]
 
     async def check_model_availability(self, model_name: str = "funasr") -> bool:
-        """Kiểm tra model có sẵn không."""
-        return self.model is not None
+        """Kiểm tra model có sẵn không (model được load lazy, chỉ báo lỗi nếu load thất bại)."""
+        return type(self)._model_error is None
 
     def cleanup_temp_files(self, older_than_hours: int = 24):
         """
@@ -230,23 +470,39 @@ class SpeechRecognitionService:
         """
         try:
             import time
-            current_time = time.time()
-
-            # Dọn dẹp trong temp_dir
-            for file_path in self.temp_dir.glob("*"):
-                if file_path.is_file():
-                    file_age = current_time - file_path.stat().st_mtime
-                    if file_age > (older_than_hours * 3600):
-                        file_path.unlink()
-                        logger.info(f"Đã xóa file tạm speech recognition: {file_path}")
-
-            # Dọn dẹp trong models_dir
-            for file_path in self.models_dir.glob("*"):
-                if file_path.is_file():
-                    file_age = current_time - file_path.stat().st_mtime
-                    if file_age > (older_than_hours * 3600):
-                        file_path.unlink()
-                        logger.info(f"Đã xóa model file cũ: {file_path}")
+            threshold = time.time() - older_than_hours * 3600
+
+            # Một vòng lặp cho cả hai thư mục; DirEntry của os.scandir đã có sẵn
+            # loại file nên mỗi entry chỉ cần đúng một lần stat
+            expired_files = []
+            for directory, label in ((self.temp_dir, "file tạm speech recognition"),
+                                     (self.models_dir, "model file cũ")):
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        if entry.stat(follow_symlinks=False).st_mtime < threshold:
+                            expired_files.append((entry.path, label))
+
+            # Ít file thì xóa tuần tự; nhiều file thì unlink song song (GIL được nhả khi unlink)
+            if len(expired_files) < PARALLEL_UNLINK_THRESHOLD:
+                for expired_file in expired_files:
+                    self._remove_file(expired_file)
+            else:
+                with ThreadPoolExecutor(max_workers=8) as executor:
+                    list(executor.map(self._remove_file, expired_files))
 
         except Exception as e:
-            logger.error(f"Lỗi khi dọn dẹp file tạm: {str(e)}")
\ No newline at end of file
+            logger.error(f"Lỗi khi dọn dẹp file tạm: {str(e)}")
+
+    @staticmethod
+    def _remove_file(expired_file: Tuple[str, str]):
+        """Xóa một file, bỏ qua nếu file đã bị xóa"""
+        file_path, label = expired_file
+        try:
+            os.unlink(file_path)
+            logger.info(f"Đã xóa {label}: {file_path}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Không thể xóa file {file_path}: {str(e)}")
\ No newline at end of file
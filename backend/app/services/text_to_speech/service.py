@@ -4,26 +4,77 @@ Xử lý việc chuyển đổi text thành audio với nhiều voice khác nhau
 """
 
 import os
+import re
+import hashlib
 import logging
-from typing import Dict, Any, List, Optional, Union
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple, Union
 from pathlib import Path
 import asyncio
 import json
+from contextlib import asynccontextmanager
 
 from app.core.config import settings
 from app.core.exceptions import VideoProcessingException
+from app.utils.fs import concat_files, fast_copy
+from app.utils.media import probe_audio
 
 logger = logging.getLogger(__name__)
 
+# Kích thước chunk đọc từ API và buffer khi ghi audio trả về xuống file
+AUDIO_CHUNK_SIZE = 64 * 1024
+AUDIO_WRITE_BUFFER_SIZE = 1024 * 1024
+
+# Text dài hơn ngưỡng này được tách theo câu và tổng hợp song song
+LONG_TEXT_MAX_CHARS = 400
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?…])\s+')
+
+# Chuẩn hóa text cho cache key: gộp khoảng trắng, bỏ dấu câu kết thúc (giữ "?" vì đổi ngữ điệu)
+_WHITESPACE_RE = re.compile(r'\s+')
+_TRAILING_PUNCT_RE = re.compile(r'[\s.!…]+$')
+
+# Segment chỉ gồm khoảng trắng/dấu câu không có gì để đọc
+_SILENT_TEXT_RE = re.compile(r'[\s.,!?;:\-–—…"\'()\[\]]*')
+
+
+def _split_sentences(text: str, max_chars: int = LONG_TEXT_MAX_CHARS) -> List[str]:
+    """Tách text theo câu rồi gộp các câu liền nhau thành chunk không quá max_chars"""
+    chunks = []
+    current = ""
+    for sentence in _SENTENCE_SPLIT_RE.split(text.strip()):
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
 
 class TextToSpeechService:
     """Service xử lý việc chuyển đổi text thành audio"""
 
-    def __init__(self):
+    # Giới hạn request đồng thời riêng cho các engine cloud có throttling
+    ENGINE_CONCURRENCY = {"azure": 4, "aws": 4, "elevenlabs": 4}
+
+    # pyttsx3 không thread-safe: mọi lần gọi engine chạy tuần tự trên một thread riêng
+    _pyttsx3_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pyttsx3")
+
+    # Tổng dung lượng cache TTS ước tính, None cho tới lần quét thư mục đầu tiên
+    _cache_bytes: Optional[int] = None
+    _cache_lock = threading.Lock()
+
+    def __init__(self, http_client=None):
         self.temp_dir = Path(settings.TEMP_DIR)
         self.temp_dir.mkdir(exist_ok=True)
         self.models_dir = Path(settings.MODELS_DIR) / "text_to_speech"
         self.models_dir.mkdir(parents=True, exist_ok=True)
+        # Cache audio theo nội dung (engine, voice, language, speed, text)
+        self.cache_dir = self.temp_dir / "tts_cache"
+        self.cache_dir.mkdir(exist_ok=True)
 
         # Cấu hình mặc định
         self.default_engine = "gtts"
@@ -31,6 +82,55 @@ class TextToSpeechService:
         self.default_speed = 1.0
         self.default_lang = "vi"
 
+        # httpx.AsyncClient dùng chung (do MainService quản lý vòng đời), có thể None
+        self.http_client = http_client
+        # Client riêng, chỉ tạo khi không được truyền client dùng chung
+        self._own_http_client = None
+
+        # Polly client tạo một lần, dùng lại cho mọi segment: ((key, secret, region), client)
+        self._polly: Optional[Tuple[Tuple[str, str, str], Any]] = None
+        self._polly_lock = threading.Lock()
+
+        # Bảng dispatch engine -> hàm TTS
+        self._engines = {
+            "gtts": self._tts_with_gtts,
+            "pyttsx3": self._tts_with_pyttsx3,
+            "azure": self._tts_with_azure,
+            "aws": self._tts_with_aws,
+            "elevenlabs": self._tts_with_elevenlabs,
+            "edgetts": self._tts_with_edgetts,
+        }
+
+        # Kết quả kiểm tra import của các engine offline/thư viện (không đổi trong process)
+        self._engine_available: Dict[str, bool] = {}
+
+    def max_concurrency(self, engine: str) -> int:
+        """Số segment được tổng hợp giọng nói đồng thời tối đa cho engine"""
+        limit = self.ENGINE_CONCURRENCY.get(engine.lower(), settings.TTS_MAX_CONCURRENCY)
+        return max(1, min(limit, settings.TTS_MAX_CONCURRENCY))
+
+    @asynccontextmanager
+    async def _http(self):
+        """Dùng HTTP client dùng chung nếu có, nếu không dùng client riêng giữ kết nối cho mọi segment"""
+        if self.http_client is not None:
+            yield self.http_client
+            return
+
+        if self._own_http_client is None:
+            import httpx
+            self._own_http_client = httpx.AsyncClient(
+                http2=True,
+                timeout=60.0,
+                limits=httpx.Limits(max_connections=16, max_keepalive_connections=16)
+            )
+        yield self._own_http_client
+
+    async def aclose(self):
+        """Đóng HTTP client riêng (client dùng chung do nơi tạo ra nó đóng)"""
+        if self._own_http_client is not None:
+            await self._own_http_client.aclose()
+            self._own_http_client = None
+
     async def text_to_speech(
         self,
         text: str,
@@ -58,27 +158,231 @@ class TextToSpeechService:
             if not text.strip():
                 raise VideoProcessingException("Text không được rỗng")
 
+            engine = engine.lower()
+            handler = self._engines.get(engine)
+            if handler is None:
+                raise VideoProcessingException(f"Engine không được hỗ trợ: {engine}")
+
+            cache_key = self._cache_key(text, engine, voice_name, speed, language)
+            cached = await asyncio.to_thread(self._load_cached_audio, cache_key, output_path)
+            if cached is not None:
+                logger.info(f"Dùng lại audio TTS đã cache: {cached['output_path']}")
+                cached.update({
+                    "engine": engine, "voice": voice_name, "language": language,
+                    "speed": speed, "text_length": len(text),
+                    "text_preview": text[:100] + "..." if len(text) > 100 else text
+                })
+                return cached
+
             logger.info(f"Bắt đầu TTS: {len(text)} ký tự với voice {voice_name} và engine {engine}")
 
-            if engine.lower() == "gtts":
-                return await self._tts_with_gtts(text, voice_name, speed, output_path, language)
-            elif engine.lower() == "pyttsx3":
-                return await self._tts_with_pyttsx3(text, voice_name, speed, output_path, language)
-            elif engine.lower() == "azure":
-                return await self._tts_with_azure(text, voice_name, speed, output_path, language)
-            elif engine.lower() == "aws":
-                return await self._tts_with_aws(text, voice_name, speed, output_path, language)
-            elif engine.lower() == "elevenlabs":
-                return await self._tts_with_elevenlabs(text, voice_name, speed, output_path, language)
-            elif engine.lower() == "edgetts":
-                return await self._tts_with_edgetts(text, voice_name, speed, output_path, language)
+            chunks = _split_sentences(text) if len(text) > LONG_TEXT_MAX_CHARS else [text]
+            if len(chunks) > 1:
+                result = await self._tts_chunks(handler, engine, text, chunks, voice_name, speed, output_path, language)
             else:
-                raise VideoProcessingException(f"Engine không được hỗ trợ: {engine}")
+                result = await handler(text, voice_name, speed, output_path, language)
+
+            await asyncio.to_thread(self._store_cached_audio, cache_key, result)
+            return result
 
         except Exception as e:
             logger.error(f"Lỗi khi TTS: {str(e)}")
             raise VideoProcessingException(f"Không thể chuyển đổi text thành audio: {str(e)}")
 
+    async def _tts_chunks(
+        self,
+        handler,
+        engine: str,
+        text: str,
+        chunks: List[str],
+        voice_name: str,
+        speed: float,
+        output_path: Optional[str],
+        language: str
+    ) -> Dict[str, Any]:
+        """Tổng hợp song song từng chunk của text dài rồi ghép theo đúng thứ tự"""
+        if output_path:
+            suffix = Path(output_path).suffix
+        else:
+            suffix = '.wav' if engine in ("pyttsx3", "azure") else '.mp3'
+            output_path = self._mktemp(suffix)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency(engine))
+
+        async def synthesize(chunk: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await handler(chunk, voice_name, speed, self._mktemp(suffix), language)
+
+        logger.info(f"Tách text dài thành {len(chunks)} đoạn để TTS song song")
+        results = await asyncio.gather(*(synthesize(chunk) for chunk in chunks), return_exceptions=True)
+        chunk_files = [r["output_path"] for r in results if isinstance(r, dict)]
+
+        try:
+            errors = [r for r in results if isinstance(r, BaseException)]
+            if errors:
+                raise errors[0]
+
+            if engine == "edgetts":
+                await asyncio.to_thread(concat_files, chunk_files, output_path)
+            else:
+                await self._concatenate_audio_files(chunk_files, output_path)
+        finally:
+            for chunk_file in chunk_files:
+                try:
+                    os.unlink(chunk_file)
+                except OSError:
+                    pass
+
+        result = self._build_result(engine, voice_name, language, speed, output_path, text)
+        result["chunks"] = len(chunks)
+        return result
+
+    def _build_result(
+        self,
+        engine: str,
+        voice_name: str,
+        language: str,
+        speed: float,
+        output_path: str,
+        text: str
+    ) -> Dict[str, Any]:
+        """Dict kết quả chung của các engine TTS, kèm kích thước và duration của file"""
+        return {
+            "success": True,
+            "engine": engine,
+            "voice": voice_name,
+            "language": language,
+            "speed": speed,
+            "output_path": output_path,
+            "file_size": os.path.getsize(output_path),
+            "duration": self._get_audio_duration(output_path),
+            "text_length": len(text),
+            "text_preview": text[:100] + "..." if len(text) > 100 else text
+        }
+
+    def _mktemp(self, suffix: str) -> str:
+        """Đường dẫn file tạm duy nhất trong temp_dir (không tạo file)"""
+        return str(self.temp_dir / f"tts_{uuid.uuid4().hex}{suffix}")
+
+    @staticmethod
+    def _cache_key(text: str, engine: str, voice_name: str, speed: float, language: str) -> str:
+        """Key SHA-256 cho cache audio, xác định bởi toàn bộ tham số ảnh hưởng tới output"""
+        if settings.TTS_CACHE_NORMALIZE_TEXT:
+            text = _TRAILING_PUNCT_RE.sub("", _WHITESPACE_RE.sub(" ", text.strip()).casefold())
+        payload = "\x00".join((engine, voice_name, language, repr(float(speed)), text))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _link_or_copy(src: str, dst: str):
+        """Hardlink src sang dst (ghi đè dst nếu có), copy nếu không hardlink được"""
+        tmp_path = f"{dst}.{threading.get_ident()}.tmp"
+        try:
+            os.link(src, tmp_path)
+            os.replace(tmp_path, dst)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            fast_copy(src, dst)
+
+    def _load_cached_audio(self, cache_key: str, output_path: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Lấy audio đã cache ra output_path, None nếu chưa có trong cache"""
+        manifest_path = self.cache_dir / f"{cache_key}.json"
+        try:
+            manifest = json.loads(manifest_path.read_text())
+            cached_file = self.cache_dir / manifest["file"]
+
+            if not output_path:
+                output_path = self._mktemp(cached_file.suffix)
+            self._link_or_copy(str(cached_file), output_path)
+
+            # Cập nhật mtime để eviction giữ lại các entry vừa dùng
+            os.utime(manifest_path)
+        except (OSError, ValueError, KeyError):
+            return None
+
+        return {
+            "success": True,
+            "output_path": output_path,
+            "file_size": manifest["file_size"],
+            "duration": manifest["duration"],
+            "cached": True
+        }
+
+    def _store_cached_audio(self, cache_key: str, result: Dict[str, Any]):
+        """Lưu audio vừa tạo vào cache kèm manifest (duration, file_size)"""
+        try:
+            source = result["output_path"]
+            cached_name = f"{cache_key}{Path(source).suffix}"
+            self._link_or_copy(source, str(self.cache_dir / cached_name))
+
+            manifest = {"file": cached_name, "file_size": result["file_size"], "duration": result["duration"]}
+            manifest_path = self.cache_dir / f"{cache_key}.json"
+            tmp_manifest = manifest_path.with_suffix(".json.tmp")
+            tmp_manifest.write_text(json.dumps(manifest))
+            os.replace(tmp_manifest, manifest_path)
+        except (OSError, KeyError) as e:
+            logger.warning(f"Không thể lưu audio TTS vào cache: {e}")
+            return
+
+        cls = type(self)
+        with cls._cache_lock:
+            if cls._cache_bytes is None:
+                cls._cache_bytes = self._scan_cache_size()
+            else:
+                cls._cache_bytes += result["file_size"]
+            over_limit = cls._cache_bytes > settings.TTS_CACHE_MAX_BYTES
+
+        if over_limit:
+            self._evict_cache()
+
+    def _scan_cache_size(self) -> int:
+        """Tổng dung lượng các file audio trong cache"""
+        total = 0
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False) and not entry.name.endswith(".json"):
+                    total += entry.stat(follow_symlinks=False).st_size
+        return total
+
+    def _evict_cache(self):
+        """Xóa các entry dùng lâu nhất (theo mtime manifest) tới khi cache còn dưới 90% giới hạn"""
+        cls = type(self)
+        with cls._cache_lock:
+            manifests = []
+            sizes = {}
+            with os.scandir(self.cache_dir) as entries:
+                for entry in entries:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    stat = entry.stat(follow_symlinks=False)
+                    if entry.name.endswith(".json"):
+                        manifests.append((stat.st_mtime, entry.name[:-len(".json")]))
+                    else:
+                        sizes[entry.name] = stat.st_size
+
+            total = sum(sizes.values())
+            target = int(settings.TTS_CACHE_MAX_BYTES * 0.9)
+            manifests.sort()
+
+            for _, cache_key in manifests:
+                if total <= target:
+                    break
+                for name in [n for n in sizes if n.startswith(cache_key)]:
+                    try:
+                        os.unlink(self.cache_dir / name)
+                        total -= sizes.pop(name)
+                    except OSError:
+                        pass
+                try:
+                    os.unlink(self.cache_dir / f"{cache_key}.json")
+                except OSError:
+                    pass
+
+            cls._cache_bytes = total
+            logger.info(f"Đã dọn cache TTS, còn {total} bytes")
+
     async def _tts_with_edgetts(
         self,
         text: str,
@@ -90,26 +394,15 @@ class TextToSpeechService:
         """TTS sử dụng Edge-TTS"""
         try:
             import edge_tts
-            import tempfile
 
             if not output_path:
-                temp_file = tempfile.NamedTemporaryFile(suffix='.mp3', delete=False)
-                output_path = temp_file.name
-                temp_file.close()
+                output_path = self._mktemp('.mp3')
 
-            rate_str = f"{int((speed - 1.0) * 100)}%"
-            communicate = edge_tts.Communicate(text, voice_name, rate=rate_str)
-            await communicate.save(output_path)
-
-            file_size = os.path.getsize(output_path)
-            duration = self._get_audio_duration(output_path)
+            with open(output_path, 'wb') as f:
+                async for chunk in self._tts_edgetts_stream(text, voice_name, speed):
+                    f.write(chunk)
 
-            result = {
-                "success": True, "engine": "edgetts", "voice": voice_name,
-                "language": language, "speed": speed, "output_path": output_path,
-                "file_size": file_size, "duration": duration, "text_length": len(text),
-                "text_preview": text[:100] + "..." if len(text) > 100 else text
-            }
+            result = self._build_result("edgetts", voice_name, language, speed, output_path, text)
             logger.info(f"Đã tạo audio với Edge-TTS: {output_path}")
             return result
         except ImportError:
@@ -120,6 +413,17 @@ class TextToSpeechService:
             raise VideoProcessingException(f"Không thể TTS với Edge-TTS: {str(e)}")
 
 
+    @staticmethod
+    async def _tts_edgetts_stream(text: str, voice_name: str, speed: float = 1.0) -> AsyncIterator[bytes]:
+        """Stream các chunk MP3 từ Edge-TTS, bỏ qua metadata (WordBoundary)"""
+        import edge_tts
+
+        rate_str = f"{int((speed - 1.0) * 100):+d}%"
+        communicate = edge_tts.Communicate(text, voice_name, rate=rate_str)
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                yield chunk["data"]
+
     async def _tts_with_gtts(
         self,
         text: str,
@@ -132,36 +436,18 @@ class TextToSpeechService:
         try:
             from gtts import gTTS
             import pygame
-            import tempfile
 
             # Tạo TTS object
             tts = gTTS(text=text, lang=language, slow=(speed < 1.0))
 
             # Tạo file tạm nếu không có output_path
             if not output_path:
-                temp_file = tempfile.NamedTemporaryFile(suffix='.mp3', delete=False)
-                output_path = temp_file.name
-                temp_file.close()
+                output_path = self._mktemp('.mp3')
 
-            # Save audio
-            tts.save(output_path)
+            # Save audio (request HTTP blocking, chạy trong thread để không chặn event loop)
+            await asyncio.to_thread(tts.save, output_path)
 
-            # Lấy thông tin file
-            file_size = os.path.getsize(output_path)
-            duration = self._get_audio_duration(output_path)
-
-            result = {
-                "success": True,
-                "engine": "gtts",
-                "voice": voice_name,
-                "language": language,
-                "speed": speed,
-                "output_path": output_path,
-                "file_size": file_size,
-                "duration": duration,
-                "text_length": len(text),
-                "text_preview": text[:100] + "..." if len(text) > 100 else text
-            }
+            result = self._build_result("gtts", voice_name, language, speed, output_path, text)
 
             logger.info(f"Đã tạo audio với gTTS: {output_path}")
             return result
@@ -184,53 +470,18 @@ class TextToSpeechService:
         """TTS sử dụng pyttsx3 (offline)"""
         try:
             import pyttsx3
-            import tempfile
-
-            # Khởi tạo engine
-            engine = pyttsx3.init()
-
-            # Cấu hình voice
-            voices = engine.getProperty('voices')
-            selected_voice = None
-
-            # Tìm voice phù hợp
-            for voice in voices:
-                if voice_name.lower() in voice.name.lower():
-                    selected_voice = voice
-                    break
-
-            if selected_voice:
-                engine.setProperty('voice', selected_voice.id)
-
-            # Cấu hình speed
-            engine.setProperty('rate', int(200 * speed))  # Default rate is 200
 
             # Tạo file tạm nếu không có output_path
             if not output_path:
-                temp_file = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-                output_path = temp_file.name
-                temp_file.close()
-
-            # Save audio
-            engine.save_to_file(text, output_path)
-            engine.runAndWait()
+                output_path = self._mktemp('.wav')
 
-            # Lấy thông tin file
-            file_size = os.path.getsize(output_path)
-            duration = self._get_audio_duration(output_path)
+            # runAndWait blocking cho tới khi tổng hợp xong
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                self._pyttsx3_executor, self._pyttsx3_save, text, voice_name, speed, output_path
+            )
 
-            result = {
-                "success": True,
-                "engine": "pyttsx3",
-                "voice": voice_name,
-                "language": language,
-                "speed": speed,
-                "output_path": output_path,
-                "file_size": file_size,
-                "duration": duration,
-                "text_length": len(text),
-                "text_preview": text[:100] + "..." if len(text) > 100 else text
-            }
+            result = self._build_result("pyttsx3", voice_name, language, speed, output_path, text)
 
             logger.info(f"Đã tạo audio với pyttsx3: {output_path}")
             return result
@@ -242,6 +493,34 @@ class TextToSpeechService:
             logger.error(f"Lỗi khi sử dụng pyttsx3: {str(e)}")
             raise VideoProcessingException(f"Không thể TTS với pyttsx3: {str(e)}")
 
+    @staticmethod
+    def _pyttsx3_save(text: str, voice_name: str, speed: float, output_path: str):
+        """Tổng hợp text ra file bằng pyttsx3 (blocking)"""
+        import pyttsx3
+
+        # Khởi tạo engine
+        engine = pyttsx3.init()
+
+        # Cấu hình voice
+        voices = engine.getProperty('voices')
+        selected_voice = None
+
+        # Tìm voice phù hợp
+        for voice in voices:
+            if voice_name.lower() in voice.name.lower():
+                selected_voice = voice
+                break
+
+        if selected_voice:
+            engine.setProperty('voice', selected_voice.id)
+
+        # Cấu hình speed
+        engine.setProperty('rate', int(200 * speed))  # Default rate is 200
+
+        # Save audio
+        engine.save_to_file(text, output_path)
+        engine.runAndWait()
+
     async def _tts_with_azure(
         self,
         text: str,
@@ -253,7 +532,6 @@ class TextToSpeechService:
         """TTS sử dụng Azure Cognitive Services"""
         try:
             import os
-            import tempfile
             from azure.cognitiveservices.speech import SpeechConfig, SpeechSynthesizer, AudioConfig
 
             # Lấy credentials từ environment
@@ -272,9 +550,7 @@ class TextToSpeechService:
 
             # Tạo file tạm nếu không có output_path
             if not output_path:
-                temp_file = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-                output_path = temp_file.name
-                temp_file.close()
+                output_path = self._mktemp('.wav')
 
             # Cấu hình audio output
             audio_config = AudioConfig(filename=output_path)
@@ -282,26 +558,11 @@ class TextToSpeechService:
             # Tạo synthesizer
             synthesizer = SpeechSynthesizer(speech_config=speech_config, audio_config=audio_config)
 
-            # Synthesize
-            result = synthesizer.speak_text_async(text).get()
+            # Synthesize (.get() blocking cho tới khi xong, chạy trong thread)
+            result = await asyncio.to_thread(lambda: synthesizer.speak_text_async(text).get())
 
             if result.reason == 1:  # Succeeded
-                # Lấy thông tin file
-                file_size = os.path.getsize(output_path)
-                duration = self._get_audio_duration(output_path)
-
-                tts_result = {
-                    "success": True,
-                    "engine": "azure",
-                    "voice": voice_name,
-                    "language": language,
-                    "speed": speed,
-                    "output_path": output_path,
-                    "file_size": file_size,
-                    "duration": duration,
-                    "text_length": len(text),
-                    "text_preview": text[:100] + "..." if len(text) > 100 else text
-                }
+                tts_result = self._build_result("azure", voice_name, language, speed, output_path, text)
 
                 logger.info(f"Đã tạo audio với Azure TTS: {output_path}")
                 return tts_result
@@ -326,7 +587,6 @@ class TextToSpeechService:
         """TTS sử dụng AWS Polly"""
         try:
             import boto3
-            import tempfile
 
             # Lấy credentials từ environment
             aws_access_key = os.getenv("AWS_ACCESS_KEY_ID")
@@ -336,22 +596,15 @@ class TextToSpeechService:
             if not aws_access_key or not aws_secret_key:
                 raise VideoProcessingException("AWS credentials chưa được cấu hình")
 
-            # Tạo Polly client
-            polly_client = boto3.client(
-                'polly',
-                aws_access_key_id=aws_access_key,
-                aws_secret_access_key=aws_secret_key,
-                region_name=aws_region
-            )
+            polly_client = self._get_polly_client(aws_access_key, aws_secret_key, aws_region)
 
             # Tạo file tạm nếu không có output_path
             if not output_path:
-                temp_file = tempfile.NamedTemporaryFile(suffix='.mp3', delete=False)
-                output_path = temp_file.name
-                temp_file.close()
+                output_path = self._mktemp('.mp3')
 
             # Synthesize speech
-            response = polly_client.synthesize_speech(
+            response = await asyncio.to_thread(
+                polly_client.synthesize_speech,
                 Text=text,
                 OutputFormat='mp3',
                 VoiceId=voice_name,
@@ -360,25 +613,9 @@ class TextToSpeechService:
 
             # Save audio
             if "AudioStream" in response:
-                with open(output_path, 'wb') as file:
-                    file.write(response['AudioStream'].read())
-
-                # Lấy thông tin file
-                file_size = os.path.getsize(output_path)
-                duration = self._get_audio_duration(output_path)
-
-                result = {
-                    "success": True,
-                    "engine": "aws",
-                    "voice": voice_name,
-                    "language": language,
-                    "speed": speed,
-                    "output_path": output_path,
-                    "file_size": file_size,
-                    "duration": duration,
-                    "text_length": len(text),
-                    "text_preview": text[:100] + "..." if len(text) > 100 else text
-                }
+                await asyncio.to_thread(self._write_stream, response['AudioStream'], output_path)
+
+                result = self._build_result("aws", voice_name, language, speed, output_path, text)
 
                 logger.info(f"Đã tạo audio với AWS Polly: {output_path}")
                 return result
@@ -392,6 +629,30 @@ class TextToSpeechService:
             logger.error(f"Lỗi khi sử dụng AWS Polly: {str(e)}")
             raise VideoProcessingException(f"Không thể TTS với AWS: {str(e)}")
 
+    def _get_polly_client(self, aws_access_key: str, aws_secret_key: str, aws_region: str):
+        """Lấy Polly client đã tạo, chỉ tạo lại khi credentials/region thay đổi"""
+        import boto3
+
+        config = (aws_access_key, aws_secret_key, aws_region)
+        with self._polly_lock:
+            if self._polly is None or self._polly[0] != config:
+                # boto3 client thread-safe, có thể dùng chung cho các segment chạy song song
+                polly_client = boto3.client(
+                    'polly',
+                    aws_access_key_id=aws_access_key,
+                    aws_secret_access_key=aws_secret_key,
+                    region_name=aws_region
+                )
+                self._polly = (config, polly_client)
+            return self._polly[1]
+
+    @staticmethod
+    def _write_stream(stream, output_path: str):
+        """Ghi StreamingBody của boto3 ra file theo từng chunk, qua buffer lớn"""
+        with open(output_path, 'wb', buffering=AUDIO_WRITE_BUFFER_SIZE) as file:
+            for chunk in stream.iter_chunks(AUDIO_CHUNK_SIZE):
+                file.write(chunk)
+
     async def _tts_with_elevenlabs(
         self,
         text: str,
@@ -402,8 +663,6 @@ class TextToSpeechService:
     ) -> Dict[str, Any]:
         """TTS sử dụng ElevenLabs"""
         try:
-            import requests
-            import tempfile
 
             # Lấy API key từ environment
             api_key = os.getenv("ELEVENLABS_API_KEY")
@@ -413,12 +672,10 @@ class TextToSpeechService:
 
             # Tạo file tạm nếu không có output_path
             if not output_path:
-                temp_file = tempfile.NamedTemporaryFile(suffix='.mp3', delete=False)
-                output_path = temp_file.name
-                temp_file.close()
+                output_path = self._mktemp('.mp3')
 
-            # API endpoint
-            url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_name}"
+            # API endpoint: /stream trả audio ngay khi tạo được, không chờ tổng hợp xong
+            url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_name}/stream"
 
             headers = {
                 "Accept": "audio/mpeg",
@@ -437,48 +694,43 @@ class TextToSpeechService:
                 }
             }
 
-            # Make request
-            response = requests.post(url, json=data, headers=headers)
-
-            if response.status_code == 200:
-                # Save audio
-                with open(output_path, 'wb') as file:
-                    file.write(response.content)
-
-                # Lấy thông tin file
-                file_size = os.path.getsize(output_path)
-                duration = self._get_audio_duration(output_path)
-
-                result = {
-                    "success": True,
-                    "engine": "elevenlabs",
-                    "voice": voice_name,
-                    "language": language,
-                    "speed": speed,
-                    "output_path": output_path,
-                    "file_size": file_size,
-                    "duration": duration,
-                    "text_length": len(text),
-                    "text_preview": text[:100] + "..." if len(text) > 100 else text
-                }
+            # Make request, ghi audio theo từng chunk thay vì giữ cả file MP3 trong bộ nhớ
+            async with self._http() as client:
+                async with client.stream(
+                    "POST", url, json=data, headers=headers,
+                    params={"output_format": "mp3_44100_128"}, timeout=60.0
+                ) as response:
+                    if response.status_code != 200:
+                        await response.aread()
+                        raise VideoProcessingException(f"ElevenLabs API error: {response.status_code} - {response.text}")
 
-                logger.info(f"Đã tạo audio với ElevenLabs: {output_path}")
-                return result
-            else:
-                raise VideoProcessingException(f"ElevenLabs API error: {response.status_code} - {response.text}")
+                    with open(output_path, 'wb', buffering=AUDIO_WRITE_BUFFER_SIZE) as file:
+                        async for chunk in response.aiter_bytes(AUDIO_CHUNK_SIZE):
+                            file.write(chunk)
+
+            result = self._build_result("elevenlabs", voice_name, language, speed, output_path, text)
+
+            logger.info(f"Đã tạo audio với ElevenLabs: {output_path}")
+            return result
 
         except ImportError:
-            logger.error("requests chưa được cài đặt")
-            raise VideoProcessingException("requests chưa được cài đặt. Chạy: pip install requests")
+            logger.error("httpx chưa được cài đặt")
+            raise VideoProcessingException("httpx chưa được cài đặt. Chạy: pip install httpx")
         except Exception as e:
             logger.error(f"Lỗi khi sử dụng ElevenLabs: {str(e)}")
             raise VideoProcessingException(f"Không thể TTS với ElevenLabs: {str(e)}")
 
     def _get_audio_duration(self, audio_path: str) -> float:
         """Lấy duration của audio file"""
+        try:
+            # Đọc header bằng PyAV ngay trong process, không fork ffprobe cho mỗi segment
+            stat = os.stat(audio_path)
+            return probe_audio(audio_path, stat.st_mtime_ns, stat.st_size)['duration']
+        except Exception as e:
+            logger.debug(f"PyAV không đọc được {audio_path}, dùng ffprobe: {e}")
+
         try:
             import subprocess
-            import json
 
             cmd = [
                 'ffprobe',
@@ -524,57 +776,130 @@ class TextToSpeechService:
 
             logger.info(f"Bắt đầu tạo audio từ {len(segments)} segments")
 
-            # Tạo audio cho từng segment
-            segment_files = []
-            total_duration = 0
-
-            for i, segment in enumerate(segments):
-                try:
-                    # Tạo audio cho segment này
-                    segment_text = segment.get("translated_text", segment.get("text", ""))
-                    if not segment_text.strip():
-                        continue
+            # Tạo audio cho các segment song song, giới hạn số request TTS đồng thời
+            semaphore = asyncio.Semaphore(self.max_concurrency(engine))
 
-                    # Tạo file tạm cho segment
-                    import tempfile
-                    temp_file = tempfile.NamedTemporaryFile(suffix='.mp3', delete=False)
-                    temp_path = temp_file.name
-                    temp_file.close()
-
-                    # TTS cho segment
-                    result = await self.text_to_speech(
-                        text=segment_text,
-                        voice_name=voice_name,
-                        engine=engine,
-                        speed=speed,
-                        output_path=temp_path
+            async def synthesize(index: int, segment: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+                async with semaphore:
+                    return await self.synthesize_segment(
+                        segment, voice_name=voice_name, engine=engine, speed=speed, index=index
                     )
 
-                    if result["success"]:
-                        segment_files.append({
-                            "file_path": result["output_path"],
-                            "duration": result["duration"],
-                            "start_time": segment.get("start", 0),
-                            "end_time": segment.get("end", 0)
-                        })
-                        total_duration += result["duration"]
+            results = await asyncio.gather(*(synthesize(i, segment) for i, segment in enumerate(segments)))
+            segment_files = [segment_file for segment_file in results if segment_file]
+
+            return await self.merge_segment_audio(
+                segment_files,
+                total_segments=len(segments),
+                voice_name=voice_name,
+                engine=engine,
+                speed=speed,
+                output_path=output_path
+            )
 
-                except Exception as e:
-                    logger.warning(f"Lỗi khi tạo audio cho segment {i}: {str(e)}")
-                    continue
+        except Exception as e:
+            logger.error(f"Lỗi khi tạo audio từ segments: {str(e)}")
+            raise VideoProcessingException(f"Không thể tạo audio từ segments: {str(e)}")
+
+    async def synthesize_segment(
+        self,
+        segment: Dict[str, Any],
+        voice_name: str = "vi",
+        engine: str = "gtts",
+        speed: float = 1.0,
+        index: int = 0
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Tạo audio cho một segment
 
+        Args:
+            segment: Segment với text (hoặc translated_text) và timing
+            voice_name: Tên voice sử dụng
+            engine: Engine sử dụng
+            speed: Tốc độ nói
+            index: Vị trí của segment (dùng cho log)
+
+        Returns:
+            Dict thông tin file audio của segment, hoặc None nếu segment rỗng/lỗi
+        """
+        temp_path = None
+        try:
+            segment_text = segment.get("translated_text", segment.get("text", ""))
+            if _SILENT_TEXT_RE.fullmatch(segment_text):
+                # Bỏ qua engine: không có gì để đọc, xử lý như segment rỗng
+                return None
+
+            # Đường dẫn file tạm cho segment, file chỉ được tạo khi engine ghi audio
+            temp_path = self._mktemp('.mp3')
+
+            # TTS cho segment
+            result = await self.text_to_speech(
+                text=segment_text,
+                voice_name=voice_name,
+                engine=engine,
+                speed=speed,
+                output_path=temp_path
+            )
+
+            if not result["success"]:
+                return None
+
+            return {
+                "file_path": result["output_path"],
+                "duration": result["duration"],
+                "start_time": segment.get("start", 0),
+                "end_time": segment.get("end", 0)
+            }
+
+        except Exception as e:
+            logger.warning(f"Lỗi khi tạo audio cho segment {index}: {str(e)}")
+            # Engine có thể đã ghi dở file trước khi lỗi
+            if temp_path:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+            return None
+
+    async def merge_segment_audio(
+        self,
+        segment_files: List[Dict[str, Any]],
+        total_segments: int,
+        voice_name: str = "vi",
+        engine: str = "gtts",
+        speed: float = 1.0,
+        output_path: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Ghép audio của các segment (đã theo đúng thứ tự) thành một file
+
+        Args:
+            segment_files: Kết quả của synthesize_segment cho từng segment
+            total_segments: Tổng số segment đầu vào
+            voice_name: Tên voice đã sử dụng
+            engine: Engine đã sử dụng
+            speed: Tốc độ nói
+            output_path: Đường dẫn file output
+
+        Returns:
+            Dict chứa thông tin audio được tạo
+        """
+        try:
             if not segment_files:
                 raise VideoProcessingException("Không thể tạo audio cho bất kỳ segment nào")
 
             # Ghép các audio segments thành một file
             if not output_path:
-                import tempfile
-                temp_file = tempfile.NamedTemporaryFile(suffix='.mp3', delete=False)
-                output_path = temp_file.name
-                temp_file.close()
+                output_path = self._mktemp('.mp3')
 
             # Ghép audio files
-            await self._concatenate_audio_files([s["file_path"] for s in segment_files], output_path)
+            input_files = [s["file_path"] for s in segment_files]
+            if engine.lower() == "edgetts":
+                # Edge-TTS trả về MP3 thô (không header, cùng định dạng) nên nối byte là đủ,
+                # không cần ffmpeg đọc lại toàn bộ audio
+                await asyncio.to_thread(concat_files, input_files, output_path)
+            else:
+                await self._concatenate_audio_files(input_files, output_path)
 
             # Dọn dẹp temp files
             for segment_file in segment_files:
@@ -596,58 +921,64 @@ class TextToSpeechService:
                 "file_size": file_size,
                 "duration": duration,
                 "segments_count": len(segment_files),
-                "total_segments": len(segments)
+                "total_segments": total_segments
             }
 
             logger.info(f"Đã tạo audio hoàn chỉnh từ segments: {output_path}")
             return result
 
         except Exception as e:
-            logger.error(f"Lỗi khi tạo audio từ segments: {str(e)}")
-            raise VideoProcessingException(f"Không thể tạo audio từ segments: {str(e)}")
+            logger.error(f"Lỗi khi ghép audio từ segments: {str(e)}")
+            raise VideoProcessingException(f"Không thể ghép audio từ segments: {str(e)}")
 
     async def _concatenate_audio_files(self, input_files: List[str], output_path: str):
         """Ghép nhiều audio files thành một file"""
         try:
-            import subprocess
-
-            # Tạo file list cho ffmpeg
-            list_file = output_path + '.txt'
-            with open(list_file, 'w') as f:
-                for input_file in input_files:
-                    f.write(f"file '{input_file}'\n")
-
-            # Chạy ffmpeg để ghép files
-            cmd = [
-                'ffmpeg',
-                '-f', 'concat',
-                '-safe', '0',
-                '-i', list_file,
-                '-c', 'copy',
-                output_path
-            ]
-
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-
-            stdout, stderr = await process.communicate()
-
-            # Dọn dẹp list file
-            try:
-                os.unlink(list_file)
-            except:
-                pass
-
-            if process.returncode != 0:
+            # File list cho concat demuxer, truyền qua stdin thay vì ghi file .txt tạm.
+            # Đường dẫn phải tuyệt đối vì không có thư mục gốc để resolve đường dẫn tương đối
+            list_data = "".join(
+                "file '{}'\n".format(os.path.abspath(input_file).replace("'", "'\\''"))
+                for input_file in input_files
+            ).encode("utf-8")
+
+            # Các segment cùng engine nên cùng codec/sample rate: ghép bằng concat demuxer
+            # và stream-copy, không decode/encode lại
+            returncode, stderr = await self._run_ffmpeg_concat(list_data, output_path, ['-c', 'copy'])
+            if returncode != 0:
+                logger.warning("Không thể stream-copy khi ghép audio, chuyển sang encode lại")
+                returncode, stderr = await self._run_ffmpeg_concat(list_data, output_path, [])
+
+            if returncode != 0:
                 raise VideoProcessingException(f"Không thể ghép audio files: {stderr.decode()}")
 
         except Exception as e:
             logger.error(f"Lỗi khi ghép audio files: {str(e)}")
             raise VideoProcessingException(f"Không thể ghép audio files: {str(e)}")
 
+    async def _run_ffmpeg_concat(self, list_data: bytes, output_path: str, codec_args: List[str]) -> Tuple[int, bytes]:
+        """Chạy ffmpeg concat demuxer với file list đọc từ stdin, trả về (returncode, stderr)"""
+        cmd = [
+            'ffmpeg',
+            '-y',  # output_path có thể đã được tạo sẵn (file tạm rỗng)
+            '-loglevel', 'error',
+            '-f', 'concat',
+            '-safe', '0',
+            '-protocol_whitelist', 'pipe,file',
+            '-i', 'pipe:0',
+            *codec_args,
+            output_path
+        ]
+
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+
+        _, stderr = await process.communicate(list_data)
+        return process.returncode, stderr
+
     def get_supported_voices(self, engine: str = "gtts") -> Dict[str, Any]:
         """Lấy danh sách voices được hỗ trợ cho engine"""
         voices = {
@@ -758,33 +1089,38 @@ class TextToSpeechService:
         Returns:
             True nếu engine có sẵn
         """
+        engine = engine.lower()
+        if engine in self._engine_available:
+            return self._engine_available[engine]
+
         try:
-            if engine.lower() == "edgetts":
-                import edge_tts
-                return True
-            elif engine.lower() == "gtts":
-                from gtts import gTTS
-                return True
-            elif engine.lower() == "pyttsx3":
-                import pyttsx3
-                return True
-            elif engine.lower() == "azure":
-                import os
+            if engine == "azure":
                 return all([
                     os.getenv("AZURE_SPEECH_KEY"),
                     os.getenv("AZURE_SPEECH_REGION")
                 ])
-            elif engine.lower() == "aws":
-                import os
+            elif engine == "aws":
                 return all([
                     os.getenv("AWS_ACCESS_KEY_ID"),
                     os.getenv("AWS_SECRET_ACCESS_KEY")
                 ])
-            elif engine.lower() == "elevenlabs":
-                import os
+            elif engine == "elevenlabs":
                 return bool(os.getenv("ELEVENLABS_API_KEY"))
+
+            # Engine dựa trên thư viện: chỉ cần thử import một lần, credentials không liên quan
+            if engine == "edgetts":
+                import edge_tts
+            elif engine == "gtts":
+                from gtts import gTTS
+            elif engine == "pyttsx3":
+                import pyttsx3
             else:
                 return False
+            self._engine_available[engine] = True
+            return True
+        except ImportError:
+            self._engine_available[engine] = False
+            return False
         except Exception as e:
             logger.error(f"Lỗi khi kiểm tra engine {engine}: {str(e)}")
             return False
@@ -798,23 +1134,21 @@ class TextToSpeechService:
         """
         try:
             import time
-            current_time = time.time()
-
-            # Dọn dẹp trong temp_dir
-            for file_path in self.temp_dir.glob("*"):
-                if file_path.is_file():
-                    file_age = current_time - file_path.stat().st_mtime
-                    if file_age > (older_than_hours * 3600):
-                        file_path.unlink()
-                        logger.info(f"Đã xóa file tạm TTS: {file_path}")
-
-            # Dọn dẹp trong models_dir
-            for file_path in self.models_dir.glob("*"):
-                if file_path.is_file():
-                    file_age = current_time - file_path.stat().st_mtime
-                    if file_age > (older_than_hours * 3600):
-                        file_path.unlink()
-                        logger.info(f"Đã xóa model file cũ: {file_path}")
+            threshold = time.time() - older_than_hours * 3600
+
+            # DirEntry của os.scandir đã có sẵn loại file nên mỗi entry chỉ cần đúng một lần stat
+            for directory, label in ((self.temp_dir, "file tạm TTS"),
+                                     (self.models_dir, "model file cũ")):
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        if entry.stat(follow_symlinks=False).st_mtime < threshold:
+                            try:
+                                os.unlink(entry.path)
+                                logger.info(f"Đã xóa {label}: {entry.path}")
+                            except FileNotFoundError:
+                                pass
 
         except Exception as e:
             logger.error(f"Lỗi khi dọn dẹp file tạm: {str(e)}")
\ No newline at end of file
@@ -4,22 +4,79 @@ Xử lý việc dịch text từ ngôn ngữ này sang ngôn ngữ khác
 """
 
 import os
+import hashlib
 import logging
-from typing import Dict, Any, List, Optional, Union
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple, Union
 from pathlib import Path
 import asyncio
-import json
+import orjson
+from contextlib import asynccontextmanager
 
 from app.core.config import settings
 from app.core.exceptions import VideoProcessingException
+from app.utils.rate_limit import AsyncRateLimiter
 
 logger = logging.getLogger(__name__)
 
+# Giới hạn mỗi batch gửi lên API dịch (số segments và tổng số ký tự)
+BATCH_MAX_ITEMS = 64
+BATCH_MAX_CHARS = 4000
+
+# AWS Translate không có API batch: nối nhiều segment bằng ký tự phân cách hiếm gặp
+# trong một request (giới hạn 10.000 byte UTF-8 nên cửa sổ ký tự nhỏ hơn)
+AWS_BATCH_SEPARATOR = "\n\u241f\n"
+AWS_BATCH_MAX_CHARS = 3000
+
+# Số batch được dịch đồng thời khi stream kết quả dịch
+STREAM_MAX_BATCHES_IN_FLIGHT = 2
+
+# Số câu mỗi lần generate của MarianMT
+LOCAL_BATCH_SIZE = 32
+
+# Các field kết quả dịch được gắn vào segment
+TRANSLATION_FIELDS = ("translated_text", "detected_source_lang", "target_lang", "confidence", "error")
+
+
+def _batch_segments(
+    segments: List[Dict[str, Any]],
+    max_items: int = BATCH_MAX_ITEMS,
+    max_chars: int = BATCH_MAX_CHARS
+) -> List[List[Dict[str, Any]]]:
+    """Chia segments thành các batch liên tiếp theo max_items / max_chars"""
+    batches = []
+    current: List[Dict[str, Any]] = []
+    current_chars = 0
+    for segment in segments:
+        text_len = len(segment["text"])
+        if current and (len(current) >= max_items or current_chars + text_len > max_chars):
+            batches.append(current)
+            current, current_chars = [], 0
+        current.append(segment)
+        current_chars += text_len
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _untranslated_segment(segment: Dict[str, Any], target_lang: str, error: Exception) -> Dict[str, Any]:
+    """Giữ nguyên text gốc khi không dịch được segment"""
+    return {
+        **segment,
+        "translated_text": segment["text"],
+        "detected_source_lang": "unknown",
+        "target_lang": target_lang,
+        "confidence": 0.0,
+        "error": str(error)
+    }
+
 
 class TranslationService:
     """Service xử lý việc dịch text"""
 
-    def __init__(self):
+    def __init__(self, http_client=None):
         self.temp_dir = Path(settings.TEMP_DIR)
         self.temp_dir.mkdir(exist_ok=True)
         self.models_dir = Path(settings.MODELS_DIR) / "translation"
@@ -29,6 +86,58 @@ class TranslationService:
         self.default_method = "google"
         self.default_target_lang = "vi"
 
+        # httpx.AsyncClient dùng chung (do MainService quản lý vòng đời), có thể None
+        self.http_client = http_client
+        # Client riêng, chỉ tạo khi không được truyền client dùng chung
+        self._own_http_client = None
+
+        # Giới hạn tốc độ gửi request tới Google Translate (dùng chung giữa các lần dịch)
+        self._google_limiter = AsyncRateLimiter(settings.GOOGLE_TRANSLATE_RATE, 1.0)
+
+        # Cache kết quả dịch (SQLite), nằm trong thư mục con để cleanup_temp_files không xóa
+        self.cache_path = self.models_dir / "cache" / "translations.sqlite3"
+        self._cache_conn: Optional[sqlite3.Connection] = None
+        self._cache_lock = threading.Lock()
+
+        # Event loop nền cho translate_text (API đồng bộ) và instance riêng chạy trên loop đó
+        self._bg_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._bg_service: Optional["TranslationService"] = None
+        self._bg_loop_lock = threading.Lock()
+
+        # MarianMT đã load theo ngôn ngữ đích: target_lang -> (tokenizer, model, device)
+        self._marian: Dict[str, Tuple[Any, Any, str]] = {}
+        self._marian_lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def _http(self):
+        """Dùng HTTP client dùng chung nếu có, nếu không dùng client riêng giữ kết nối giữa các lần dịch"""
+        if self.http_client is not None:
+            yield self.http_client
+            return
+
+        if self._own_http_client is None:
+            import httpx
+            self._own_http_client = httpx.AsyncClient(
+                http2=True,
+                timeout=60.0,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+            )
+        yield self._own_http_client
+
+    async def aclose(self):
+        """Đóng HTTP client riêng (client dùng chung do nơi tạo ra nó đóng) và event loop nền"""
+        if self._own_http_client is not None:
+            await self._own_http_client.aclose()
+            self._own_http_client = None
+
+        with self._bg_loop_lock:
+            loop, service = self._bg_loop, self._bg_service
+            self._bg_loop = self._bg_service = None
+        if loop is not None:
+            # Client của instance nền phải được đóng trên chính loop của nó
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(service.aclose(), loop))
+            loop.call_soon_threadsafe(loop.stop)
+
     async def translate_segments(
         self,
         segments: List[Dict[str, Any]],
@@ -50,27 +159,193 @@ class TranslationService:
             if not segments:
                 return []
 
+            method = method.lower()
             logger.info(f"Bắt đầu dịch {len(segments)} segments sang {target_lang} với method {method}")
 
-            if method.lower() == "google":
-                return await self._translate_with_google(segments, target_lang)
-            elif method.lower() == "azure":
-                return await self._translate_with_azure(segments, target_lang)
-            elif method.lower() == "aws":
-                return await self._translate_with_aws(segments, target_lang)
-            elif method.lower() == "openrouter":
-                return await self._translate_with_openrouter(segments, target_lang)
-            elif method.lower() == "ollama":
-                return await self._translate_with_ollama(segments, target_lang)
-            elif method.lower() == "local":
-                return await self._translate_with_local_model(segments, target_lang)
-            else:
-                raise VideoProcessingException(f"Phương pháp dịch không được hỗ trợ: {method}")
+            # Segment đã dịch trước đó lấy từ cache, chỉ gửi phần còn lại lên provider
+            keys = [self._cache_key(method, target_lang, segment["text"]) for segment in segments]
+            cached = await asyncio.to_thread(self._cache_lookup, keys)
+
+            misses = [segment for segment, key in zip(segments, keys) if key not in cached]
+            if cached:
+                logger.info(f"Lấy {len(segments) - len(misses)}/{len(segments)} segments từ cache dịch")
+
+            # Text trùng lặp (câu cửa miệng, tên người nói, ...) chỉ dịch một lần
+            unique_misses: Dict[str, Dict[str, Any]] = {}
+            for segment in misses:
+                unique_misses.setdefault(segment["text"], segment)
+            if len(unique_misses) < len(misses):
+                logger.info(f"Bỏ qua {len(misses) - len(unique_misses)}/{len(misses)} segments trùng text")
+
+            translated_unique = []
+            if unique_misses:
+                translated_unique = await self._translate_uncached(list(unique_misses.values()), target_lang, method)
+            await asyncio.to_thread(self._cache_store, [
+                (self._cache_key(method, target_lang, segment["text"]), segment)
+                for segment in translated_unique
+                if "error" not in segment
+            ])
+
+            # text -> các field kết quả dịch, dùng chung cho mọi segment cùng text
+            translations = {
+                text: {field: result[field] for field in TRANSLATION_FIELDS if field in result}
+                for text, result in zip(unique_misses, translated_unique)
+            }
+
+            translated_segments = []
+            for segment, key in zip(segments, keys):
+                if key in cached:
+                    translated_text, source_lang, confidence = cached[key]
+                    translated_segments.append({
+                        **segment,
+                        "translated_text": translated_text,
+                        "detected_source_lang": source_lang,
+                        "target_lang": target_lang,
+                        "confidence": confidence
+                    })
+                else:
+                    translated_segments.append({**segment, **translations[segment["text"]]})
+            return translated_segments
 
         except Exception as e:
             logger.error(f"Lỗi khi dịch segments: {str(e)}")
             raise VideoProcessingException(f"Không thể dịch segments: {str(e)}")
 
+    async def stream_translate_segments(
+        self,
+        segments: List[Dict[str, Any]],
+        target_lang: str = "vi",
+        method: str = "google",
+        batch_size: int = BATCH_MAX_ITEMS
+    ) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Dịch segments theo từng batch và trả về từng segment ngay khi batch của nó dịch xong
+
+        Args:
+            segments: Danh sách segments cần dịch
+            target_lang: Ngôn ngữ đích
+            method: Phương pháp dịch
+            batch_size: Số segments mỗi lần gọi translate_segments
+
+        Yields:
+            Tuple (vị trí của segment trong danh sách đầu vào, segment đã dịch),
+            theo thứ tự hoàn thành chứ không theo thứ tự đầu vào
+        """
+        results: asyncio.Queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(STREAM_MAX_BATCHES_IN_FLIGHT)
+
+        async def translate_batch(start: int):
+            async with semaphore:
+                try:
+                    batch = await self.translate_segments(
+                        segments[start:start + batch_size], target_lang, method
+                    )
+                    await results.put((start, batch))
+                except Exception as e:
+                    await results.put((start, e))
+
+        tasks = [
+            asyncio.ensure_future(translate_batch(start))
+            for start in range(0, len(segments), batch_size)
+        ]
+        try:
+            for _ in tasks:
+                start, batch = await results.get()
+                if isinstance(batch, Exception):
+                    raise batch
+                for offset, segment in enumerate(batch):
+                    yield start + offset, segment
+        finally:
+            # Hủy các batch còn đang dịch và chờ chúng dừng hẳn
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _translate_uncached(
+        self,
+        segments: List[Dict[str, Any]],
+        target_lang: str,
+        method: str
+    ) -> List[Dict[str, Any]]:
+        """Gửi segments tới provider tương ứng với method"""
+        if method == "google":
+            return await self._translate_with_google(segments, target_lang)
+        elif method == "azure":
+            return await self._translate_with_azure(segments, target_lang)
+        elif method == "aws":
+            return await self._translate_with_aws(segments, target_lang)
+        elif method == "openrouter":
+            return await self._translate_with_openrouter(segments, target_lang)
+        elif method == "ollama":
+            return await self._translate_with_ollama(segments, target_lang)
+        elif method == "local":
+            return await self._translate_with_local_model(segments, target_lang)
+        else:
+            raise VideoProcessingException(f"Phương pháp dịch không được hỗ trợ: {method}")
+
+    @staticmethod
+    def _cache_key(method: str, target_lang: str, text: str) -> str:
+        """Key cache dịch: method, ngôn ngữ đích và hash của text"""
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+        return f"{method}:{target_lang}:{digest}"
+
+    def _get_cache_conn(self) -> sqlite3.Connection:
+        """Mở (một lần) database cache dịch; phải gọi khi đang giữ _cache_lock"""
+        if self._cache_conn is None:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.cache_path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "key TEXT PRIMARY KEY, translated_text TEXT NOT NULL, "
+                "source_lang TEXT, confidence REAL, created_at REAL NOT NULL)"
+            )
+            self._cache_conn = conn
+        return self._cache_conn
+
+    def _cache_lookup(self, keys: List[str]) -> Dict[str, Tuple[str, str, float]]:
+        """Tra cache theo danh sách key, trả về key -> (translated_text, source_lang, confidence)"""
+        unique_keys = list(dict.fromkeys(keys))
+        min_created_at = time.time() - settings.TRANSLATION_CACHE_TTL_HOURS * 3600
+        found: Dict[str, Tuple[str, str, float]] = {}
+        try:
+            with self._cache_lock:
+                conn = self._get_cache_conn()
+                # SQLite giới hạn số tham số mỗi câu lệnh
+                for i in range(0, len(unique_keys), 500):
+                    chunk = unique_keys[i:i + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = conn.execute(
+                        f"SELECT key, translated_text, source_lang, confidence FROM translations "
+                        f"WHERE key IN ({placeholders}) AND created_at >= ?",
+                        (*chunk, min_created_at)
+                    )
+                    for key, translated_text, source_lang, confidence in rows:
+                        found[key] = (translated_text, source_lang or "unknown", confidence or 0.0)
+        except sqlite3.Error as e:
+            logger.warning(f"Không thể đọc cache dịch: {e}")
+        return found
+
+    def _cache_store(self, items: List[Tuple[str, Dict[str, Any]]]):
+        """Lưu các segment dịch thành công vào cache trong một transaction"""
+        if not items:
+            return
+        now = time.time()
+        try:
+            with self._cache_lock:
+                conn = self._get_cache_conn()
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)",
+                        [
+                            (key, segment["translated_text"], segment.get("detected_source_lang"),
+                             segment.get("confidence"), now)
+                            for key, segment in items
+                        ]
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f"Không thể ghi cache dịch: {e}")
+
     async def _translate_with_openrouter(
         self,
         segments: List[Dict[str, Any]],
@@ -79,37 +354,41 @@ class TranslationService:
     ) -> List[Dict[str, Any]]:
         """Dịch sử dụng OpenRouter API"""
         try:
-            import httpx
             api_key = os.getenv("OPENROUTER_API_KEY")
             if not api_key:
                 raise VideoProcessingException("OPENROUTER_API_KEY chưa được cấu hình")
 
-            translated_segments = []
-            async with httpx.AsyncClient() as client:
-                for segment in segments:
-                    try:
-                        response = await client.post(
-                            "https://openrouter.ai/api/v1/chat/completions",
-                            headers={
-                                "Authorization": f"Bearer {api_key}",
-                                "Content-Type": "application/json"
-                            },
-                            json={
-                                "model": model,
-                                "messages": [
-                                    {"role": "system", "content": f"Translate the following text to {target_lang}. Output only the translated text."},
-                                    {"role": "user", "content": segment["text"]}
-                                ]
-                            }
-                        )
-                        response.raise_for_status()
-                        data = response.json()
-                        translated_text = data['choices'][0]['message']['content'].strip()
-                        translated_segments.append({**segment, "translated_text": translated_text})
-                    except Exception as e:
-                        logger.warning(f"Lỗi khi dịch segment với OpenRouter: {e}")
-                        translated_segments.append({**segment, "translated_text": segment["text"]})
-            return translated_segments
+            semaphore = asyncio.Semaphore(settings.TRANSLATION_CONCURRENCY)
+
+            async with self._http() as client:
+                async def translate_one(segment: Dict[str, Any]) -> Dict[str, Any]:
+                    async with semaphore:
+                        try:
+                            response = await client.post(
+                                "https://openrouter.ai/api/v1/chat/completions",
+                                headers={
+                                    "Authorization": f"Bearer {api_key}",
+                                    "Content-Type": "application/json"
+                                },
+                                content=orjson.dumps({
+                                    "model": model,
+                                    "messages": [
+                                        {"role": "system", "content": f"Translate the following text to {target_lang}. Output only the translated text."},
+                                        {"role": "user", "content": segment["text"]}
+                                    ]
+                                }),
+                                timeout=60.0
+                            )
+                            response.raise_for_status()
+                            data = orjson.loads(response.content)
+                            translated_text = data['choices'][0]['message']['content'].strip()
+                            return {**segment, "translated_text": translated_text}
+                        except Exception as e:
+                            logger.warning(f"Lỗi khi dịch segment với OpenRouter: {e}")
+                            return _untranslated_segment(segment, target_lang, e)
+
+                # Các request dùng chung một connection pool, gather giữ nguyên thứ tự segments
+                return list(await asyncio.gather(*(translate_one(segment) for segment in segments)))
         except Exception as e:
             raise VideoProcessingException(f"Lỗi khi sử dụng OpenRouter: {e}")
 
@@ -121,29 +400,33 @@ class TranslationService:
     ) -> List[Dict[str, Any]]:
         """Dịch sử dụng Ollama local server"""
         try:
-            import httpx
             ollama_url = os.getenv("OLLAMA_API_URL", "http://localhost:11434/api/generate")
             
-            translated_segments = []
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                for segment in segments:
-                    try:
-                        response = await client.post(
-                            ollama_url,
-                            json={
-                                "model": model,
-                                "prompt": f"Translate the following text to {target_lang}. Output only the translated text.\n\n{segment['text']}",
-                                "stream": False
-                            }
-                        )
-                        response.raise_for_status()
-                        data = response.json()
-                        translated_text = data['response'].strip()
-                        translated_segments.append({**segment, "translated_text": translated_text})
-                    except Exception as e:
-                        logger.warning(f"Lỗi khi dịch segment với Ollama: {e}")
-                        translated_segments.append({**segment, "translated_text": segment["text"]})
-            return translated_segments
+            semaphore = asyncio.Semaphore(settings.TRANSLATION_CONCURRENCY)
+
+            async with self._http() as client:
+                async def translate_one(segment: Dict[str, Any]) -> Dict[str, Any]:
+                    async with semaphore:
+                        try:
+                            response = await client.post(
+                                ollama_url,
+                                headers={"Content-Type": "application/json"},
+                                content=orjson.dumps({
+                                    "model": model,
+                                    "prompt": f"Translate the following text to {target_lang}. Output only the translated text.\n\n{segment['text']}",
+                                    "stream": False
+                                }),
+                                timeout=60.0
+                            )
+                            response.raise_for_status()
+                            data = orjson.loads(response.content)
+                            translated_text = data['response'].strip()
+                            return {**segment, "translated_text": translated_text}
+                        except Exception as e:
+                            logger.warning(f"Lỗi khi dịch segment với Ollama: {e}")
+                            return _untranslated_segment(segment, target_lang, e)
+
+                return list(await asyncio.gather(*(translate_one(segment) for segment in segments)))
         except Exception as e:
             raise VideoProcessingException(f"Lỗi khi sử dụng Ollama: {e}")
 
@@ -156,43 +439,37 @@ class TranslationService:
         """Dịch sử dụng Google Translate API"""
         try:
             from googletrans import Translator
-            import time
 
             translator = Translator()
-            translated_segments = []
+            semaphore = asyncio.Semaphore(settings.TRANSLATION_CONCURRENCY)
 
-            for i, segment in enumerate(segments):
-                try:
-                    # Dịch text
-                    result = translator.translate(
-                        segment["text"],
-                        dest=target_lang,
-                        src='auto'
-                    )
+            async def translate_one(i: int, segment: Dict[str, Any]) -> Dict[str, Any]:
+                async with semaphore, self._google_limiter:
+                    try:
+                        # googletrans là client sync nên chạy trong thread
+                        result = await asyncio.to_thread(
+                            translator.translate,
+                            segment["text"],
+                            dest=target_lang,
+                            src='auto'
+                        )
 
-                    translated_segments.append({
-                        **segment,
-                        "translated_text": result.text,
-                        "detected_source_lang": result.src,
-                        "target_lang": target_lang,
-                        "confidence": result.extra_data.get('confidence', 0.0) if hasattr(result, 'extra_data') else 0.0
-                    })
+                        return {
+                            **segment,
+                            "translated_text": result.text,
+                            "detected_source_lang": result.src,
+                            "target_lang": target_lang,
+                            "confidence": result.extra_data.get('confidence', 0.0) if hasattr(result, 'extra_data') else 0.0
+                        }
 
-                    # Tránh rate limiting
-                    if (i + 1) % 10 == 0:
-                        await asyncio.sleep(1)
+                    except Exception as e:
+                        logger.warning(f"Lỗi khi dịch segment {i}: {str(e)}")
+                        # Giữ nguyên text gốc nếu không dịch được
+                        return _untranslated_segment(segment, target_lang, e)
 
-                except Exception as e:
-                    logger.warning(f"Lỗi khi dịch segment {i}: {str(e)}")
-                    # Giữ nguyên text gốc nếu không dịch được
-                    translated_segments.append({
-                        **segment,
-                        "translated_text": segment["text"],
-                        "detected_source_lang": "unknown",
-                        "target_lang": target_lang,
-                        "confidence": 0.0,
-                        "error": str(e)
-                    })
+            translated_segments = list(await asyncio.gather(
+                *(translate_one(i, segment) for i, segment in enumerate(segments))
+            ))
 
             logger.info(f"Đã dịch thành công {len(translated_segments)} segments với Google Translate")
             return translated_segments
@@ -229,39 +506,40 @@ class TranslationService:
                 region=region
             )
 
-            translated_segments = []
+            semaphore = asyncio.Semaphore(settings.TRANSLATION_CONCURRENCY)
 
-            for segment in segments:
-                try:
-                    # Dịch text
-                    response = client.translate(
-                        body=[segment["text"]],
-                        to_language=[target_lang],
-                        from_language=None
-                    )
+            async def translate_batch(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+                async with semaphore:
+                    try:
+                        # Một request cho cả batch; client của Azure là sync nên chạy trong thread
+                        response = await asyncio.to_thread(
+                            client.translate,
+                            body=[segment["text"] for segment in batch],
+                            to_language=[target_lang],
+                            from_language=None
+                        )
 
-                    if response and len(response) > 0:
-                        translation = response[0].translations[0]
-                        translated_segments.append({
-                            **segment,
-                            "translated_text": translation.text,
-                            "detected_source_lang": translation.detected_language.language if translation.detected_language else "unknown",
-                            "target_lang": target_lang,
-                            "confidence": translation.confidence if translation.confidence else 0.0
-                        })
-                    else:
-                        raise Exception("Không nhận được response từ Azure")
+                        if not response or len(response) != len(batch):
+                            raise Exception("Không nhận được đủ response từ Azure")
+
+                        results = []
+                        for segment, item in zip(batch, response):
+                            translation = item.translations[0]
+                            results.append({
+                                **segment,
+                                "translated_text": translation.text,
+                                "detected_source_lang": item.detected_language.language if item.detected_language else "unknown",
+                                "target_lang": target_lang,
+                                "confidence": item.detected_language.score if item.detected_language else 0.0
+                            })
+                        return results
 
-                except Exception as e:
-                    logger.warning(f"Lỗi khi dịch segment: {str(e)}")
-                    translated_segments.append({
-                        **segment,
-                        "translated_text": segment["text"],
-                        "detected_source_lang": "unknown",
-                        "target_lang": target_lang,
-                        "confidence": 0.0,
-                        "error": str(e)
-                    })
+                    except Exception as e:
+                        logger.warning(f"Lỗi khi dịch batch {len(batch)} segments: {str(e)}")
+                        return [_untranslated_segment(segment, target_lang, e) for segment in batch]
+
+            batches = await asyncio.gather(*(translate_batch(batch) for batch in _batch_segments(segments)))
+            translated_segments = [segment for batch in batches for segment in batch]
 
             logger.info(f"Đã dịch thành công {len(translated_segments)} segments với Azure Translator")
             return translated_segments
@@ -297,35 +575,57 @@ class TranslationService:
                 region_name=aws_region
             )
 
-            translated_segments = []
+            semaphore = asyncio.Semaphore(settings.TRANSLATION_CONCURRENCY)
 
-            for segment in segments:
-                try:
-                    # Dịch text
-                    response = client.translate_text(
-                        Text=segment["text"],
-                        SourceLanguageCode='auto',
-                        TargetLanguageCode=target_lang
-                    )
+            def translate_text(text: str) -> Dict[str, Any]:
+                return client.translate_text(
+                    Text=text,
+                    SourceLanguageCode='auto',
+                    TargetLanguageCode=target_lang
+                )
 
-                    translated_segments.append({
-                        **segment,
-                        "translated_text": response['TranslatedText'],
-                        "detected_source_lang": response.get('SourceLanguageCode', 'unknown'),
-                        "target_lang": target_lang,
-                        "confidence": response.get('AppliedTerminologies', [{}])[0].get('Terms', [{}])[0].get('Confidence', 0.0) if response.get('AppliedTerminologies') else 0.0
-                    })
+            def translated_segment(segment: Dict[str, Any], translated_text: str, response: Dict[str, Any]) -> Dict[str, Any]:
+                return {
+                    **segment,
+                    "translated_text": translated_text,
+                    "detected_source_lang": response.get('SourceLanguageCode', 'unknown'),
+                    "target_lang": target_lang,
+                    "confidence": response.get('AppliedTerminologies', [{}])[0].get('Terms', [{}])[0].get('Confidence', 0.0) if response.get('AppliedTerminologies') else 0.0
+                }
 
-                except Exception as e:
-                    logger.warning(f"Lỗi khi dịch segment: {str(e)}")
-                    translated_segments.append({
-                        **segment,
-                        "translated_text": segment["text"],
-                        "detected_source_lang": "unknown",
-                        "target_lang": target_lang,
-                        "confidence": 0.0,
-                        "error": str(e)
-                    })
+            async def translate_batch(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+                async with semaphore:
+                    if len(batch) > 1:
+                        try:
+                            # Một request cho cả batch, tách lại theo ký tự phân cách
+                            response = await asyncio.to_thread(
+                                translate_text, AWS_BATCH_SEPARATOR.join(segment["text"] for segment in batch)
+                            )
+                            parts = response['TranslatedText'].split(AWS_BATCH_SEPARATOR.strip())
+                            if len(parts) == len(batch):
+                                return [
+                                    translated_segment(segment, part.strip(), response)
+                                    for segment, part in zip(batch, parts)
+                                ]
+                            logger.debug(f"AWS trả về {len(parts)}/{len(batch)} đoạn, dịch lại từng segment")
+                        except Exception as e:
+                            logger.debug(f"Không dịch được batch với AWS, dịch lại từng segment: {e}")
+
+                    # Dịch từng segment khi batch chỉ có một segment hoặc không tách lại được
+                    results = []
+                    for segment in batch:
+                        try:
+                            response = await asyncio.to_thread(translate_text, segment["text"])
+                            results.append(translated_segment(segment, response['TranslatedText'], response))
+                        except Exception as e:
+                            logger.warning(f"Lỗi khi dịch segment: {str(e)}")
+                            results.append(_untranslated_segment(segment, target_lang, e))
+                    return results
+
+            batches = await asyncio.gather(
+                *(translate_batch(batch) for batch in _batch_segments(segments, max_chars=AWS_BATCH_MAX_CHARS))
+            )
+            translated_segments = [segment for batch in batches for segment in batch]
 
             logger.info(f"Đã dịch thành công {len(translated_segments)} segments với AWS Translate")
             return translated_segments
@@ -344,53 +644,47 @@ class TranslationService:
     ) -> List[Dict[str, Any]]:
         """Dịch sử dụng local model (MarianMT)"""
         try:
-            from transformers import MarianMTModel, MarianTokenizer
-            import torch
-
-            # Load model và tokenizer
-            model_name = f"Helsinki-NLP/opus-mt-en-{target_lang}" if target_lang != "vi" else "Helsinki-NLP/opus-mt-en-vi"
-            tokenizer = MarianTokenizer.from_pretrained(model_name)
-            model = MarianMTModel.from_pretrained(model_name)
-
-            # Sử dụng GPU nếu có
-            device = "cuda" if torch.cuda.is_available() else "cpu"
-            model = model.to(device)
-
-            translated_segments = []
-
-            for segment in segments:
+            tokenizer, model, device = await self._get_marian(target_lang)
+
+            def translate_batch(texts: List[str]) -> List[str]:
+                import torch
+
+                # Tokenize cả batch (padding về cùng độ dài) và generate một lần
+                inputs = tokenizer(
+                    texts,
+                    return_tensors="pt",
+                    padding=True,
+                    truncation=True,
+                    max_length=512
+                ).to(device)
+                with torch.inference_mode():
+                    translated = model.generate(**inputs, max_new_tokens=256)
+                return tokenizer.batch_decode(translated, skip_special_tokens=True)
+
+            # Sắp xếp theo độ dài để các câu trong một batch có độ dài gần nhau, ít padding
+            order = sorted(range(len(segments)), key=lambda i: len(segments[i]["text"]))
+            translated_segments: List[Optional[Dict[str, Any]]] = [None] * len(segments)
+
+            for start in range(0, len(order), LOCAL_BATCH_SIZE):
+                batch_indices = order[start:start + LOCAL_BATCH_SIZE]
+                batch = [segments[i] for i in batch_indices]
                 try:
-                    # Tokenize
-                    inputs = tokenizer(
-                        segment["text"],
-                        return_tensors="pt",
-                        padding=True,
-                        truncation=True,
-                        max_length=512
-                    ).to(device)
-
-                    # Generate translation
-                    translated = model.generate(**inputs)
-                    translated_text = tokenizer.batch_decode(translated, skip_special_tokens=True)[0]
-
-                    translated_segments.append({
-                        **segment,
-                        "translated_text": translated_text,
-                        "detected_source_lang": "en",  # Local models thường chỉ hỗ trợ English
-                        "target_lang": target_lang,
-                        "confidence": 0.8  # Confidence mặc định cho local models
-                    })
+                    translated_texts = await asyncio.to_thread(
+                        translate_batch, [segment["text"] for segment in batch]
+                    )
+                    for i, segment, translated_text in zip(batch_indices, batch, translated_texts):
+                        translated_segments[i] = {
+                            **segment,
+                            "translated_text": translated_text,
+                            "detected_source_lang": "en",  # Local models thường chỉ hỗ trợ English
+                            "target_lang": target_lang,
+                            "confidence": 0.8  # Confidence mặc định cho local models
+                        }
 
                 except Exception as e:
-                    logger.warning(f"Lỗi khi dịch segment: {str(e)}")
-                    translated_segments.append({
-                        **segment,
-                        "translated_text": segment["text"],
-                        "detected_source_lang": "unknown",
-                        "target_lang": target_lang,
-                        "confidence": 0.0,
-                        "error": str(e)
-                    })
+                    logger.warning(f"Lỗi khi dịch batch {len(batch)} segments: {str(e)}")
+                    for i, segment in zip(batch_indices, batch):
+                        translated_segments[i] = _untranslated_segment(segment, target_lang, e)
 
             logger.info(f"Đã dịch thành công {len(translated_segments)} segments với local model")
             return translated_segments
@@ -402,6 +696,39 @@ class TranslationService:
             logger.error(f"Lỗi khi sử dụng local model: {str(e)}")
             raise VideoProcessingException(f"Không thể dịch với local model: {str(e)}")
 
+    async def _get_marian(self, target_lang: str) -> Tuple[Any, Any, str]:
+        """Lấy MarianMT tokenizer/model cho target_lang, load một lần cho mỗi ngôn ngữ"""
+        if target_lang in self._marian:
+            return self._marian[target_lang]
+
+        async with self._marian_lock:
+            if target_lang not in self._marian:
+                self._marian[target_lang] = await asyncio.to_thread(self._load_marian, target_lang)
+        return self._marian[target_lang]
+
+    @staticmethod
+    def _load_marian(target_lang: str) -> Tuple[Any, Any, str]:
+        """Load MarianMT tokenizer và model (blocking: đọc weights, copy lên GPU)"""
+        from transformers import MarianMTModel, MarianTokenizer
+        import torch
+
+        model_name = f"Helsinki-NLP/opus-mt-en-{target_lang}"
+        tokenizer = MarianTokenizer.from_pretrained(model_name)
+        model = MarianMTModel.from_pretrained(model_name)
+
+        # Sử dụng GPU nếu có, fp16 trên GPU để giảm một nửa băng thông đọc weights
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        model = model.to(device)
+        if device == "cuda":
+            model = model.half()
+        elif settings.MARIAN_INT8_CPU:
+            # Dynamic quantization: weights Linear lưu int8, activation vẫn float
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        model.eval()
+
+        logger.info(f"Đã load MarianMT {model_name} trên {device}")
+        return tokenizer, model, device
+
     async def translate_with_fallback(
         self,
         segments: List[Dict[str, Any]],
@@ -438,6 +765,72 @@ class TranslationService:
         text: str,
         target_lang: str = "vi",
         method: str = "google"
+    ) -> Dict[str, Any]:
+        """
+        Dịch một đoạn text đơn giản (API đồng bộ, cho script/code không chạy async)
+
+        Coroutine chạy trên một event loop nền dùng lại giữa các lần gọi, không tạo
+        và hủy event loop cho mỗi đoạn text. Loop nền dùng một TranslationService riêng
+        (HTTP client, rate limiter, lock riêng) vì các object này gắn với event loop
+        đã dùng chúng; chỉ model MarianMT đã load được dùng chung.
+
+        Không gọi từ bên trong một event loop đang chạy (sẽ block chính loop đó),
+        khi đó dùng `await atranslate_text(...)`.
+
+        Args:
+            text: Text cần dịch
+            target_lang: Ngôn ngữ đích
+            method: Phương pháp dịch
+
+        Returns:
+            Dict chứa kết quả dịch
+
+        Raises:
+            RuntimeError: Nếu được gọi trong thread đang chạy event loop
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError(
+                "translate_text() không thể gọi trong event loop đang chạy, "
+                "hãy dùng 'await atranslate_text(...)'"
+            )
+
+        loop, service = self._get_background_service()
+        future = asyncio.run_coroutine_threadsafe(
+            service.atranslate_text(text, target_lang, method), loop
+        )
+        return future.result()
+
+    def _get_background_service(self) -> Tuple[asyncio.AbstractEventLoop, "TranslationService"]:
+        """Event loop chạy trên daemon thread riêng và instance dùng loop đó, tạo ở lần gọi đầu tiên"""
+        with self._bg_loop_lock:
+            if self._bg_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="translation-loop", daemon=True
+                ).start()
+                # Tạo instance ngay trên loop nền để lock/limiter của nó gắn với loop này
+                self._bg_service = asyncio.run_coroutine_threadsafe(
+                    self._new_background_service(), loop
+                ).result()
+                self._bg_loop = loop
+            return self._bg_loop, self._bg_service
+
+    async def _new_background_service(self) -> "TranslationService":
+        """TranslationService riêng cho event loop nền, không dùng HTTP client dùng chung"""
+        service = TranslationService()
+        # Model MarianMT không gắn với event loop, dùng chung để không load lại
+        service._marian = self._marian
+        return service
+
+    async def atranslate_text(
+        self,
+        text: str,
+        target_lang: str = "vi",
+        method: str = "google"
     ) -> Dict[str, Any]:
         """
         Dịch một đoạn text đơn giản
@@ -461,9 +854,7 @@ class TranslationService:
             }
 
             # Dịch
-            translated_segments = asyncio.run(
-                self.translate_segments([fake_segment], target_lang, method)
-            )
+            translated_segments = await self.translate_segments([fake_segment], target_lang, method)
 
             if translated_segments:
                 return {
@@ -672,8 +1063,7 @@ class TranslationService:
                 return os.getenv("OPENROUTER_API_KEY") is not None
             elif method.lower() == "ollama":
                 try:
-                    import httpx
-                    async with httpx.AsyncClient() as client:
+                    async with self._http() as client:
                         response = await client.get(os.getenv("OLLAMA_API_URL", "http://localhost:11434"))
                         return response.status_code == 200
                 except Exception:
@@ -717,5 +1107,15 @@ class TranslationService:
                         file_path.unlink()
                         logger.info(f"Đã xóa model file cũ: {file_path}")
 
+            # Xóa các kết quả dịch đã hết hạn trong cache
+            if self.cache_path.exists():
+                with self._cache_lock:
+                    conn = self._get_cache_conn()
+                    with conn:
+                        conn.execute(
+                            "DELETE FROM translations WHERE created_at < ?",
+                            (current_time - settings.TRANSLATION_CACHE_TTL_HOURS * 3600,)
+                        )
+
         except Exception as e:
             logger.error(f"Lỗi khi dọn dẹp file tạm: {str(e)}")
\ No newline at end of file
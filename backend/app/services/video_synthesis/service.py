@@ -11,11 +11,19 @@ import asyncio
 import json
 import subprocess
 
+import orjson
+
 from app.core.config import settings
 from app.core.exceptions import VideoProcessingException
 
 logger = logging.getLogger(__name__)
 
+# Các field ffprobe cần trả về cho _get_video_info (bỏ qua tags, disposition, side_data, ...)
+VIDEO_PROBE_ENTRIES = (
+    "format=duration,size,bit_rate,format_name"
+    ":stream=codec_type,codec_name,width,height,r_frame_rate"
+)
+
 
 class VideoSynthesisService:
     """Service xử lý việc tổng hợp video từ các thành phần"""
@@ -83,7 +91,7 @@ class VideoSynthesisService:
                 )
 
             # Lấy thông tin video cuối cùng
-            video_info = self._get_video_info(final_video_path)
+            video_info = await asyncio.to_thread(self._get_video_info, final_video_path)
 
             result = {
                 "success": True,
@@ -366,22 +374,20 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
             if not os.path.exists(video_path):
                 return {'error': 'File không tồn tại'}
 
-            # Sử dụng ffprobe để lấy thông tin
+            # Sử dụng ffprobe để lấy thông tin, chỉ yêu cầu các field cần dùng
             cmd = [
                 'ffprobe',
                 '-v', 'quiet',
                 '-print_format', 'json',
-                '-show_format',
-                '-show_streams',
+                '-show_entries', VIDEO_PROBE_ENTRIES,
                 video_path
             ]
 
-            process = subprocess.run(cmd, capture_output=True, text=True)
+            process = subprocess.run(cmd, capture_output=True)
             if process.returncode != 0:
                 return {'error': 'Không thể đọc thông tin video'}
 
-            import json
-            info = json.loads(process.stdout)
+            info = orjson.loads(process.stdout)
 
             # Lấy thông tin cơ bản
             video_info = {
@@ -3,7 +3,6 @@ File handling utilities for Vietnamese AI Dubbing API
 """
 
 import os
-import shutil
 import uuid
 from pathlib import Path
 from typing import Optional, Tuple
@@ -11,6 +10,7 @@ import logging
 
 from app.core.config import settings
 from app.core.exceptions import FileUploadException
+from app.utils.fs import fast_move
 
 logger = logging.getLogger(__name__)
 
@@ -55,7 +55,7 @@ class FileHandler:
             temp_filename = f"{uuid.uuid4()}{source_path.suffix}"
             temp_path = self.temp_dir / temp_filename
 
-            shutil.move(str(source_path), str(temp_path))
+            fast_move(str(source_path), str(temp_path))
             logger.info(f"File moved to temp: {temp_path}")
             return str(temp_path)
 
@@ -70,7 +70,7 @@ class FileHandler:
             output_filename = f"processed_{job_id}{source_path.suffix}"
             output_path = self.output_dir / output_filename
 
-            shutil.move(str(source_path), str(output_path))
+            fast_move(str(source_path), str(output_path))
             logger.info(f"File moved to output: {output_path}")
             return str(output_path)
 
@@ -0,0 +1,99 @@
+"""
+Filesystem copy/move utilities for Vietnamese AI Dubbing API
+"""
+
+import errno
+import os
+import shutil
+
+# Chunk size for each copy_file_range call
+_COPY_CHUNK_SIZE = 64 * 1024 * 1024
+
+# Buffer size for the userspace fallback in concat_files
+_COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def _copy_fd_range(fsrc, fdst) -> bool:
+    """
+    Copy the rest of open file fsrc to the current offset of fdst in the kernel
+
+    Returns False when os.copy_file_range (Linux >= 4.5) is unavailable or
+    unsupported for these files and nothing was copied, so the caller can fall
+    back to a userspace copy.
+    """
+    if not hasattr(os, "copy_file_range"):
+        return False
+
+    fdst.flush()
+    remaining = os.fstat(fsrc.fileno()).st_size - fsrc.tell()
+    copied_any = False
+    try:
+        while remaining > 0:
+            copied = os.copy_file_range(
+                fsrc.fileno(), fdst.fileno(), min(remaining, _COPY_CHUNK_SIZE)
+            )
+            if copied == 0:
+                break
+            copied_any = True
+            remaining -= copied
+    except OSError as e:
+        if not copied_any and e.errno in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+            return False
+        raise
+
+    # Keep the Python file objects' offsets in sync with the kernel's
+    fsrc.seek(0, os.SEEK_END)
+    fdst.seek(0, os.SEEK_END)
+    return remaining <= 0
+
+
+def _copy_file_range(src: str, dst: str) -> bool:
+    """
+    Copy src to dst inside the kernel with os.copy_file_range (Linux >= 4.5)
+
+    Returns False when the syscall is unavailable or unsupported for these
+    files, so the caller can fall back to a userspace copy.
+    """
+    if not hasattr(os, "copy_file_range"):
+        return False
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        return _copy_fd_range(fsrc, fdst)
+
+
+def fast_copy(src: str, dst: str) -> str:
+    """Copy a file, preferring an in-kernel copy over shutil's userspace loop"""
+    if not _copy_file_range(src, dst):
+        shutil.copyfile(src, dst)
+    return dst
+
+
+def fast_move(src: str, dst: str) -> str:
+    """
+    Move a file with the cheapest available mechanism
+
+    os.replace is an atomic rename when src and dst are on the same
+    filesystem; across filesystems the data is copied with fast_copy and the
+    source removed afterwards.
+    """
+    try:
+        os.replace(src, dst)
+        return dst
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    fast_copy(src, dst)
+    shutil.copystat(src, dst)
+    os.unlink(src)
+    return dst
+
+
+def concat_files(srcs, dst: str) -> str:
+    """Write the byte-wise concatenation of srcs to dst"""
+    with open(dst, "wb") as fdst:
+        for src in srcs:
+            with open(src, "rb") as fsrc:
+                if not _copy_fd_range(fsrc, fdst):
+                    shutil.copyfileobj(fsrc, fdst, _COPY_BUFFER_SIZE)
+    return dst
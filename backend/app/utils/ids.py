@@ -0,0 +1,25 @@
+"""
+ID generation utilities for Vietnamese AI Dubbing API
+"""
+
+import os
+import time
+import uuid
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Generate a time-ordered UUID version 7 (RFC 9562)
+
+    48-bit Unix timestamp in milliseconds followed by 74 random bits, so new
+    IDs are appended at the tail of a btree index instead of scattered across it.
+    """
+    timestamp_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+
+    value = (timestamp_ms & ((1 << 48) - 1)) << 80
+    value |= 0x7 << 76                      # version
+    value |= ((rand >> 68) & 0xFFF) << 64   # rand_a
+    value |= 0b10 << 62                     # variant
+    value |= rand & ((1 << 62) - 1)         # rand_b
+    return uuid.UUID(int=value)
@@ -0,0 +1,74 @@
+"""
+Media probing utilities for Vietnamese AI Dubbing API
+"""
+
+from functools import lru_cache
+from typing import Any, Dict
+
+from app.core.exceptions import VideoProcessingException
+
+
+@lru_cache(maxsize=1024)
+def probe_audio(path: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+    """
+    Read audio metadata with PyAV (libavformat, in-process, no ffprobe fork)
+
+    Cached by (path, mtime_ns, size) so an overwritten file is read again.
+    """
+    import av
+
+    with av.open(path, metadata_errors='ignore') as container:
+        audio_info = {
+            'duration': container.duration / av.time_base if container.duration else 0.0,
+            'size': size,
+            'bitrate': container.bit_rate or 0,
+            'format': container.format.name
+        }
+
+        for stream in container.streams.audio:
+            codec_context = stream.codec_context
+            layout = codec_context.layout
+            audio_info.update({
+                'codec': codec_context.name or 'Unknown',
+                'sample_rate': codec_context.sample_rate or 0,
+                'channels': len(layout.channels) if layout else 0,
+                'channel_layout': layout.name if layout else 'Unknown'
+            })
+            break
+
+    return audio_info
+
+
+def decode_audio(path: str, samplerate: int, channels: int = 1):
+    """
+    Decode the first audio stream of a file into a float32 array (channels, samples)
+
+    Every frame is resampled by PyAV to the requested sample rate and channel
+    count, so callers can feed the result straight into a model.
+    """
+    import av
+    import numpy as np
+
+    resampler = av.AudioResampler(
+        format='fltp',
+        layout='stereo' if channels == 2 else 'mono',
+        rate=samplerate
+    )
+
+    chunks = []
+    with av.open(path, metadata_errors='ignore') as container:
+        if not container.streams.audio:
+            raise VideoProcessingException(f"No audio stream in file: {path}")
+
+        for frame in container.decode(container.streams.audio[0]):
+            for resampled in resampler.resample(frame):
+                chunks.append(resampled.to_ndarray())
+
+        # Flush samples still buffered in the resampler
+        for resampled in resampler.resample(None):
+            chunks.append(resampled.to_ndarray())
+
+    if not chunks:
+        raise VideoProcessingException(f"Could not decode audio: {path}")
+
+    return np.concatenate(chunks, axis=1)
@@ -0,0 +1,25 @@
+"""
+Keyset (cursor) pagination utilities for Vietnamese AI Dubbing API
+"""
+
+import base64
+from datetime import datetime
+from typing import Tuple
+
+from app.core.exceptions import ValidationException
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode (created_at, id) of the last row into an opaque cursor token"""
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor token back into (created_at, id)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeError) as e:
+        raise ValidationException("Invalid pagination cursor", detail=str(e))
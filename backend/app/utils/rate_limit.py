@@ -0,0 +1,47 @@
+"""
+Rate limiting utilities for Vietnamese AI Dubbing API
+"""
+
+import asyncio
+import time
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket allowing max_rate acquisitions per time_period
+
+    Bursts up to max_rate go through immediately; after that callers wait just
+    long enough for the next token, in arrival order.
+    """
+
+    def __init__(self, max_rate: float, time_period: float = 1.0):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._tokens_per_second = max_rate / time_period
+        self._tokens = float(max_rate)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            float(self.max_rate),
+            self._tokens + (now - self._updated_at) * self._tokens_per_second
+        )
+        self._updated_at = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self._tokens_per_second)
+                self._refill()
+            self._tokens -= 1
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
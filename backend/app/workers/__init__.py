@@ -0,0 +1,43 @@
+"""
+Arq worker for out-of-process video dubbing
+
+Start with: arq app.workers.WorkerSettings
+"""
+
+from typing import Any, Dict
+
+from arq.connections import RedisSettings
+
+from app.core.config import settings
+from app.core.database import close_db
+from app.core.logging import setup_logging
+from app.services.main_service import MainService
+
+from .tasks import process_video_dubbing_task
+
+
+async def startup(ctx: Dict[str, Any]) -> None:
+    """Khởi tạo MainService một lần cho mỗi worker process"""
+    setup_logging()
+    ctx["main_service"] = MainService()
+    await ctx["main_service"].warmup()
+
+
+async def shutdown(ctx: Dict[str, Any]) -> None:
+    """Giải phóng MainService và đóng kết nối database khi worker dừng"""
+    await ctx["main_service"].aclose()
+    await close_db()
+
+
+class WorkerSettings:
+    """Arq worker configuration"""
+
+    functions = [process_video_dubbing_task]
+    redis_settings = RedisSettings.from_dsn(settings.REDIS_URL)
+    on_startup = startup
+    on_shutdown = shutdown
+    max_jobs = settings.WORKER_MAX_JOBS
+    job_timeout = settings.WORKER_JOB_TIMEOUT
+
+
+__all__ = ['WorkerSettings', 'process_video_dubbing_task']
@@ -0,0 +1,25 @@
+"""
+Background tasks executed by the Arq worker process
+"""
+
+import logging
+from typing import Any, Dict, Union
+
+logger = logging.getLogger(__name__)
+
+
+async def process_video_dubbing_task(
+    ctx: Dict[str, Any],
+    video_input: Union[str, bytes],
+    job_id: str,
+    **options: Any
+) -> Dict[str, Any]:
+    """
+    Chạy toàn bộ quy trình dubbing cho một job trong worker
+
+    `options` (translator_method, voice_name, tts_engine, input_type) được chuyển thẳng cho
+    MainService.process_video_dubbing.
+    """
+    logger.info(f"Worker nhận job {job_id}")
+    main_service = ctx["main_service"]
+    return await main_service.process_video_dubbing(video_input=video_input, job_id=job_id, **options)
@@ -6,16 +6,20 @@ Main application entry point
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 import time
 import logging
 from contextlib import asynccontextmanager
+from arq import create_pool
+from arq.connections import RedisSettings
 
 from app.core.config import settings
 from app.core.database import init_db, close_db
+from app.core.cache import init_cache, close_cache
 from app.api.api_v1.api import api_router
 from app.core.exceptions import ValidationException, NotFoundException
 from app.core.logging import setup_logging
+from app.services.main_service import MainService
 
 
 # Setup logging
@@ -31,9 +35,29 @@ async def lifespan(app: FastAPI):
     # Initialize database
     await init_db()
 
+    # Initialize response cache
+    await init_cache()
+
+    # Create shared service orchestrator once per process
+    app.state.main_service = MainService()
+
+    # Connect to the worker queue; without it jobs run in-process
+    try:
+        app.state.arq = await create_pool(RedisSettings.from_dsn(settings.REDIS_URL))
+        logger.info("✅ Connected to Arq job queue")
+    except Exception as e:
+        logger.warning(f"⚠️ Job queue unavailable, falling back to in-process background tasks: {e}")
+        app.state.arq = None
+        # Jobs will run in this process, so load the models now
+        await app.state.main_service.warmup()
+
     yield
 
     # Cleanup
+    if app.state.arq is not None:
+        await app.state.arq.close()
+    await app.state.main_service.aclose()
+    await close_cache()
     await close_db()
     logger.info("👋 Shutting down Vietnamese AI Dubbing API")
 
@@ -46,6 +70,7 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -68,6 +68,11 @@ export interface Job {
   error_message?: string;
 }
 
+export interface Page<T> {
+  items: T[];
+  next: string | null;
+}
+
 export interface JobStats {
   total_jobs: number;
   status_counts: Record<string, number>;
@@ -104,8 +109,8 @@ export const api = {
       status?: string;
       user_id?: string;
       limit?: number;
-      offset?: number;
-    }) => apiClient.get<Job[]>('/jobs', { params }),
+      cursor?: string;
+    }) => apiClient.get<Page<Job>>('/jobs', { params }),
 
     get: (jobId: string) => apiClient.get<Job>(`/jobs/${jobId}`),
 
@@ -134,7 +139,7 @@ export const api = {
 
   // Users
   users: {
-    list: (params?: { skip?: number; limit?: number }) =>
+    list: (params?: { limit?: number; cursor?: string }) =>
       apiClient.get('/users', { params }),
 
     get: (userId: number) => apiClient.get(`/users/${userId}`),
@@ -48,10 +48,9 @@ const JobsPage: React.FC = () => {
     try {
       setLocalLoading(true);
       const response = await api.jobs.list({
-        limit: 100,
-        offset: 0
+        limit: 100
       });
-      setJobs(response.data);
+      setJobs(response.data.items);
     } catch (error: any) {
       setError('Không thể tải danh sách jobs: ' + error.message);
     } finally {